@@ -0,0 +1,255 @@
+"""Health checking and circuit breakers for the remote agents."""
+
+import asyncio
+import logging
+import time
+
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+
+import httpx
+
+from common.types import AgentCard, TaskState
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATES = (CLOSED, OPEN, HALF_OPEN)
+# Final task states of a request the agent handled. Anything else, such as
+# a task left working after a JSON-RPC error in the stream, is a failure.
+HANDLED_STATES = (
+    TaskState.COMPLETED.value,
+    TaskState.INPUT_REQUIRED.value,
+    TaskState.CANCELED.value,
+)
+
+
+def card_url(agent_url: str) -> str:
+    return f'{agent_url.rstrip("/")}/.well-known/agent.json'
+
+
+class CircuitBreaker:
+    """Stops requests to an agent after repeated failures or slow responses.
+
+    The breaker opens after `failure_threshold` consecutive failures; a
+    response whose first event takes longer than `latency_slo` seconds
+    counts as a failure. An open breaker rejects requests. After
+    `open_seconds` it becomes half open and the next health probe decides
+    whether it closes or stays open for another period.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        latency_slo: float = 30.0,
+        open_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+
+    @property
+    def allows_requests(self) -> bool:
+        return self.state == CLOSED
+
+    def try_half_open(self) -> bool:
+        """Moves an open breaker whose period has passed to half open."""
+        if (
+            self.state == OPEN
+            and time.monotonic() - self.opened_at >= self.open_seconds
+        ):
+            self.state = HALF_OPEN
+        return self.state == HALF_OPEN
+
+    def record_success(self, latency: float):
+        if latency > self.latency_slo:
+            logger.warning(
+                '%s responded in %.1f s, over the %.1f s SLO',
+                self.name,
+                latency,
+                self.latency_slo,
+            )
+            self.record_failure()
+            return
+        self.failures = 0
+        if self.state != CLOSED:
+            logger.info('Circuit for %s closed', self.name)
+            self.state = CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.failures >= self.failure_threshold
+        ):
+            logger.warning(
+                'Circuit for %s opened after %d failure(s)',
+                self.name,
+                self.failures,
+            )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.opened += 1
+
+
+class AgentHealthMonitor:
+    """Probes the agents in the background and tracks their requests.
+
+    Each agent URL (an agent may have several replicas) has a circuit
+    breaker fed by its requests (see `track`) and by probes of its agent
+    card every `probe_interval` seconds. An agent is available while any
+    of its replicas is. A request fails when it raises or when the task
+    does not end completed, waiting for input or canceled. A failed probe counts as a failure; a
+    successful probe only closes a half-open breaker, so a reachable agent
+    whose tasks fail still trips its breaker.
+
+    Agents whose card could not be fetched at startup are watched by URL,
+    and `on_discover` is called with the card once a probe reaches them.
+
+    The monitor runs on the event loop and is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        probe_interval: float = 5.0,
+        probe_timeout: float = 2.0,
+        failure_threshold: int = 3,
+        latency_slo: float = 30.0,
+        open_seconds: float = 30.0,
+        on_discover: Callable[[str, AgentCard], Awaitable[None]] | None = None,
+    ):
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.latency_slo = latency_slo
+        self.open_seconds = open_seconds
+        self.on_discover = on_discover
+        # Agent name -> URLs of its replicas.
+        self.urls: dict[str, list[str]] = {}
+        # Replica URL -> its breaker.
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.undiscovered: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    def add_agent(self, name: str, url: str):
+        self.urls.setdefault(name, []).append(url)
+        self.breakers[url] = CircuitBreaker(
+            f'{name} at {url}',
+            self.failure_threshold,
+            self.latency_slo,
+            self.open_seconds,
+        )
+        self.undiscovered.discard(url)
+
+    def watch(self, url: str):
+        """Probes an agent whose card is not known yet."""
+        self.undiscovered.add(url)
+
+    def allow(self, name: str) -> bool:
+        urls = self.urls.get(name)
+        return urls is None or any(map(self.allow_replica, urls))
+
+    def allow_replica(self, url: str) -> bool:
+        breaker = self.breakers.get(url)
+        return breaker is None or breaker.allows_requests
+
+    def available(self, names: Iterable[str]) -> list[str]:
+        return [name for name in names if self.allow(name)]
+
+    async def track(self, url: str, stream: AsyncIterator) -> AsyncIterator:
+        """Relays a replica's response and records its outcome.
+
+        The response's last event carries the final task state.
+        """
+        breaker = self.breakers[url]
+        start = time.perf_counter()
+        latency = None
+        state = None
+        try:
+            async for item in stream:
+                if latency is None:
+                    latency = time.perf_counter() - start
+                state = item.get('state', state)
+                yield item
+        except Exception:
+            breaker.record_failure()
+            raise
+        if state not in HANDLED_STATES:
+            logger.debug('Task on %s ended in state %s', breaker.name, state)
+            breaker.record_failure()
+            return
+        if latency is None:
+            latency = time.perf_counter() - start
+        breaker.record_success(latency)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        stats = {state: 0 for state in STATES}
+        for breaker in self.breakers.values():
+            stats[breaker.state] += 1
+        stats['undiscovered'] = len(self.undiscovered)
+        stats['opened'] = sum(b.opened for b in self.breakers.values())
+        return stats
+
+    async def _probe_loop(self):
+        async with httpx.AsyncClient(timeout=self.probe_timeout) as client:
+            while True:
+                await asyncio.gather(
+                    *(self._probe(client, url) for url in list(self.breakers)),
+                    *(
+                        self._discover(client, url)
+                        for url in list(self.undiscovered)
+                    ),
+                )
+                await asyncio.sleep(self.probe_interval)
+
+    async def _probe(self, client: httpx.AsyncClient, url: str):
+        breaker = self.breakers[url]
+        if breaker.state == OPEN and not breaker.try_half_open():
+            return
+        start = time.perf_counter()
+        try:
+            response = await client.get(card_url(url))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.debug('Probe of %s failed: %s', breaker.name, e)
+            breaker.record_failure()
+            return
+        if breaker.state == HALF_OPEN:
+            breaker.record_success(time.perf_counter() - start)
+
+    async def _discover(self, client: httpx.AsyncClient, url: str):
+        try:
+            response = await client.get(card_url(url))
+            response.raise_for_status()
+            card = AgentCard(**response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            logger.debug('Agent at %s is still unreachable: %s', url, e)
+            return
+        logger.info('Discovered %s at %s', card.name, url)
+        self.undiscovered.discard(url)
+        if self.on_discover is not None:
+            try:
+                await self.on_discover(url, card)
+            except Exception:
+                logger.exception('Failed to add the agent at %s', url)
+                self.undiscovered.add(url)
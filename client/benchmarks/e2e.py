@@ -0,0 +1,429 @@
+"""End-to-end benchmark of the host's /chat endpoint.
+
+Starts stub A2A agents and the host app on local ports, replaces the
+routing model with an in-process fake, and drives /chat with concurrent
+simulated users. No network access or API key is needed.
+
+The stub agents answer with a configurable delay, stream status updates at
+a fixed cadence, return an artifact of a given size and fail a fraction of
+tasks. Each agent can run as several replicas that process a limited
+number of tasks at a time, to measure how throughput scales with replicas.
+The report covers end-to-end latency percentiles, time to the first SSE
+event, and the event rate.
+
+Run from the client directory:
+
+    uv run python -m benchmarks.e2e --users 20 --requests 10
+"""
+
+import asyncio
+import base64
+import contextlib
+import json
+import random
+import threading
+import time
+
+from types import SimpleNamespace
+
+import asyncclick as click
+import httpx
+import uvicorn
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+    Artifact,
+    FileContent,
+    FilePart,
+    GetTaskResponse,
+    Message,
+    SendTaskResponse,
+    SendTaskStreamingResponse,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+STUB_AGENTS = [
+    (
+        'Currency Agent',
+        'Helps with exchange rates for currencies',
+        ['currency conversion', 'currency exchange'],
+        'What is exchange rate between USD and GBP?',
+    ),
+    (
+        'Image Generator Agent',
+        'Generate an image based on the prompt.',
+        ['generate image', 'edit image'],
+        'Generate a photorealistic image of raspberry lemonade',
+    ),
+    (
+        'Reimbursement Agent',
+        'Handles the reimbursement process for the employees.',
+        ['reimbursement'],
+        'Can you reimburse me $20 for my lunch with the clients?',
+    ),
+]
+USER_MESSAGES = [example for _, _, _, example in STUB_AGENTS]
+
+
+class StubAgent:
+    """A2A JSON-RPC server that simulates an agent's timing and payloads."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        tags: list[str],
+        example: str,
+        port: int,
+        latency: float,
+        stream_events: int,
+        cadence: float,
+        artifact_bytes: int,
+        failure_rate: float,
+        streaming: bool,
+        seed: int,
+        concurrency: int = 0,
+    ):
+        self.port = port
+        self.latency = latency
+        self.stream_events = stream_events
+        self.cadence = cadence
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.tasks: dict[str, Task] = {}
+        # Tasks beyond the concurrency limit wait, like on a busy agent.
+        self.slots = asyncio.Semaphore(concurrency) if concurrency else None
+        self.card = AgentCard(
+            name=name,
+            description=description,
+            url=f'http://127.0.0.1:{port}/',
+            version='1.0.0',
+            capabilities=AgentCapabilities(streaming=streaming),
+            skills=[
+                AgentSkill(
+                    id=name.lower().replace(' ', '_'),
+                    name=name,
+                    description=description,
+                    tags=tags,
+                    examples=[example],
+                )
+            ],
+        )
+        if artifact_bytes:
+            payload = base64.b64encode(random.randbytes(artifact_bytes))
+            self.artifact_part = FilePart(
+                file=FileContent(
+                    name='artifact.png',
+                    mimeType='image/png',
+                    bytes=payload.decode('utf-8'),
+                )
+            )
+        else:
+            self.artifact_part = TextPart(text=f'{name} result')
+        self.app = Starlette(
+            routes=[
+                Route('/', self.handle, methods=['POST']),
+                Route('/.well-known/agent.json', self.get_card),
+            ]
+        )
+
+    async def get_card(self, request: Request):
+        return JSONResponse(self.card.model_dump(exclude_none=True))
+
+    async def handle(self, request: Request):
+        body = await request.json()
+        params = body['params']
+        if body['method'] == 'tasks/get':
+            task = self.tasks[params['id']]
+            response = GetTaskResponse(id=body['id'], result=task)
+            return JSONResponse(response.model_dump(exclude_none=True))
+        if body['method'] == 'tasks/sendSubscribe':
+            return StreamingResponse(
+                self._limited(self._stream(body['id'], params)),
+                media_type='text/event-stream',
+            )
+        async with self.slots or contextlib.nullcontext():
+            task = await self._run(params)
+        response = SendTaskResponse(id=body['id'], result=task)
+        return JSONResponse(response.model_dump(exclude_none=True))
+
+    async def _limited(self, stream):
+        async with self.slots or contextlib.nullcontext():
+            async for event in stream:
+                yield event
+
+    def _finish(self, params: dict) -> Task:
+        failed = self.random.random() < self.failure_rate
+        state = TaskState.FAILED if failed else TaskState.COMPLETED
+        task = Task(
+            id=params['id'],
+            sessionId=params.get('sessionId'),
+            status=TaskStatus(state=state),
+            artifacts=None if failed else [Artifact(parts=[self.artifact_part])],
+        )
+        self.tasks[task.id] = task
+        return task
+
+    async def _run(self, params: dict) -> Task:
+        await asyncio.sleep(self.latency)
+        return self._finish(params)
+
+    async def _stream(self, request_id, params: dict):
+        def event(result) -> str:
+            response = SendTaskStreamingResponse(id=request_id, result=result)
+            return f'data: {response.model_dump_json(exclude_none=True)}\n\n'
+
+        task_id = params['id']
+        for i in range(self.stream_events):
+            await asyncio.sleep(self.cadence)
+            yield event(
+                TaskStatusUpdateEvent(
+                    id=task_id,
+                    status=TaskStatus(
+                        state=TaskState.WORKING,
+                        message=Message(
+                            role='agent',
+                            parts=[TextPart(text=f'Working ({i + 1})...')],
+                        ),
+                    ),
+                    final=False,
+                )
+            )
+        await asyncio.sleep(
+            max(0.0, self.latency - self.stream_events * self.cadence)
+        )
+        task = self._finish(params)
+        if task.artifacts:
+            yield event(
+                TaskArtifactUpdateEvent(id=task_id, artifact=task.artifacts[0])
+            )
+        yield event(
+            TaskStatusUpdateEvent(id=task_id, status=task.status, final=True)
+        )
+
+
+class FakeGenaiClient:
+    """Stands in for `genai.Client`; picks an allowed function at random."""
+
+    latency = 0.0
+    seed = 0
+
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+        self._random = random.Random(self.seed)
+
+    def generate_content(self, model, config, contents):
+        # The host calls the model from a thread, so the fake blocks as well.
+        time.sleep(self.latency)
+        self.calls += 1
+        names = config.tool_config.function_calling_config.allowed_function_names
+        text = contents[-1]['parts'][0]['text']
+        function_call = SimpleNamespace(
+            name=self._random.choice(names), args={'message': text}
+        )
+        part = SimpleNamespace(function_call=function_call)
+        return SimpleNamespace(
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))],
+            text='',
+        )
+
+
+def start_server(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning')
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f'Server on port {port} failed to start')
+        time.sleep(0.05)
+    return server
+
+
+async def run_user(
+    client: httpx.AsyncClient,
+    url: str,
+    user: int,
+    requests: int,
+    results: list[dict],
+):
+    conversation_id = f'user-{user}'
+    for i in range(requests):
+        message = USER_MESSAGES[(user + i) % len(USER_MESSAGES)]
+        payload = {
+            'history': [{'role': 'user', 'parts': [{'text': message}]}],
+            'conversationId': conversation_id,
+        }
+        start = time.perf_counter()
+        first_event = None
+        events = 0
+        state = None
+        error = None
+        try:
+            async with client.stream('POST', url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    if first_event is None:
+                        first_event = time.perf_counter() - start
+                    events += 1
+                    state = json.loads(line[5:]).get('state', state)
+        except httpx.HTTPError as e:
+            error = str(e)
+        results.append(
+            {
+                'latency': time.perf_counter() - start,
+                'first_event': first_event,
+                'events': events,
+                'state': state,
+                'error': error,
+            }
+        )
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+def report(label: str, values: list[float]):
+    print(
+        f'{label:<20} p50 {percentile(values, 50) * 1000:8.1f} ms'
+        f'   p95 {percentile(values, 95) * 1000:8.1f} ms'
+        f'   p99 {percentile(values, 99) * 1000:8.1f} ms'
+    )
+
+
+@click.command()
+@click.option('--users', default=10, help='Concurrent simulated users.')
+@click.option('--requests', default=5, help='Chat turns per user.')
+@click.option('--agent-latency', default=0.5, help='Seconds per agent task.')
+@click.option('--stream-events', default=3, help='Status updates per task.')
+@click.option('--cadence', default=0.1, help='Seconds between updates.')
+@click.option('--artifact-bytes', default=0, help='Binary artifact size.')
+@click.option('--failure-rate', default=0.0, help='Fraction of failed tasks.')
+@click.option('--streaming/--no-streaming', default=True)
+@click.option('--routing-latency', default=0.3, help='Fake model seconds.')
+@click.option(
+    '--local-routing/--no-local-routing',
+    default=False,
+    help='Let the intent classifier route before the fake model.',
+)
+@click.option('--replicas', default=1, help='Replicas of each stub agent.')
+@click.option(
+    '--agent-concurrency',
+    default=0,
+    help='Tasks a replica processes at a time (0 for no limit).',
+)
+@click.option(
+    '--balancing',
+    type=click.Choice(['least_outstanding', 'latency_weighted']),
+    default='least_outstanding',
+)
+@click.option('--base-port', default=18000)
+@click.option('--seed', default=0)
+async def main(
+    users: int,
+    requests: int,
+    agent_latency: float,
+    stream_events: int,
+    cadence: float,
+    artifact_bytes: int,
+    failure_rate: float,
+    streaming: bool,
+    routing_latency: float,
+    local_routing: bool,
+    replicas: int,
+    agent_concurrency: int,
+    balancing: str,
+    base_port: int,
+    seed: int,
+):
+    stubs = []
+    for i, (name, description, tags, example) in enumerate(STUB_AGENTS):
+        for replica in range(replicas):
+            port = base_port + 1 + len(stubs)
+            stub = StubAgent(
+                name,
+                description,
+                tags,
+                example,
+                port=port,
+                latency=agent_latency,
+                stream_events=stream_events,
+                cadence=cadence,
+                artifact_bytes=artifact_bytes,
+                failure_rate=failure_rate,
+                streaming=streaming,
+                seed=seed + len(stubs),
+                concurrency=agent_concurrency,
+            )
+            start_server(stub.app, stub.port)
+            stubs.append(stub)
+
+    # Imported late so the patches below are in place before the host's
+    # lifespan discovers the agents.
+    import host_agent_thread
+
+    FakeGenaiClient.latency = routing_latency
+    FakeGenaiClient.seed = seed
+    host_agent_thread.genai.Client = FakeGenaiClient
+    host_agent_thread.AGENT_URLS = [f'http://127.0.0.1:{s.port}' for s in stubs]
+    host_agent_thread.REPLICA_BALANCING = balancing
+    if not local_routing:
+        host_agent_thread.INTENT_CONFIDENCE_THRESHOLD = 2.0
+    start_server(host_agent_thread.app, base_port)
+
+    url = f'http://127.0.0.1:{base_port}/chat'
+    results: list[dict] = []
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=None) as client:
+        await asyncio.gather(
+            *(run_user(client, url, u, requests, results) for u in range(users))
+        )
+    elapsed = time.perf_counter() - start
+
+    completed = [r for r in results if r['error'] is None]
+    events = sum(r['events'] for r in completed)
+    print(f'users x requests:    {users} x {requests}')
+    print(f'replicas per agent:  {replicas} ({balancing})')
+    print(f'wall time:           {elapsed:8.2f} s')
+    print(f'throughput:          {len(completed) / elapsed:8.2f} chats/sec')
+    print(f'event rate:          {events / elapsed:8.2f} events/sec')
+    print(f'errors:              {len(results) - len(completed)}')
+    print(
+        'failed tasks:        '
+        f'{sum(r["state"] == TaskState.FAILED.value for r in completed)}'
+    )
+    # With LLM replay enabled the fake sits behind a ReplayGenaiClient.
+    host_model = host_agent_thread.host_agent
+    host_model = getattr(host_model, 'client', host_model)
+    print(f'routing model calls: {host_model.calls}')
+    report('latency', [r['latency'] for r in completed])
+    report(
+        'time to first event',
+        [r['first_event'] for r in completed if r['first_event'] is not None],
+    )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
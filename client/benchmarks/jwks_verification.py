@@ -0,0 +1,82 @@
+"""Benchmark push notification verification throughput.
+
+Compares the stock `PushNotificationReceiverAuth`, which resolves the
+signing key through `PyJWKClient` on every notification, with
+`CachedPushNotificationReceiverAuth`. No network is used: the JWKS is
+served from memory.
+
+Run from the client directory:
+
+    uv run python -m benchmarks.jwks_verification --iterations 2000
+"""
+
+import asyncio
+import time
+
+import asyncclick as click
+
+from jwt import PyJWKClient
+
+from common.utils.push_notification_auth import (
+    PushNotificationReceiverAuth,
+    PushNotificationSenderAuth,
+)
+from push_auth import CachedPushNotificationReceiverAuth
+
+
+class _InMemoryJWKClient(PyJWKClient):
+    """PyJWKClient that returns a fixed JWKS instead of fetching it."""
+
+    def __init__(self, jwks: dict):
+        super().__init__('http://localhost/.well-known/jwks.json')
+        self._jwks = jwks
+
+    def fetch_data(self):
+        return self._jwks
+
+
+class _FakeRequest:
+    def __init__(self, headers: dict, body: dict):
+        self.headers = headers
+        self._body = body
+
+    async def json(self):
+        return self._body
+
+
+async def _measure(auth, request, iterations: int) -> float:
+    # Warm up caches so both variants are measured in steady state.
+    await auth.verify_push_notification(request)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await auth.verify_push_notification(request)
+    return iterations / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option('--iterations', default=2000)
+async def main(iterations: int):
+    sender = PushNotificationSenderAuth()
+    sender.generate_jwk()
+    jwks = {'keys': sender.public_keys}
+    body = {'id': 'task-1', 'status': {'state': 'working'}}
+    token = sender._generate_jwt(body)
+    request = _FakeRequest({'Authorization': f'Bearer {token}'}, body)
+
+    baseline = PushNotificationReceiverAuth()
+    baseline.jwks_client = _InMemoryJWKClient(jwks)
+
+    cached = CachedPushNotificationReceiverAuth()
+    cached.add_jwks(jwks)
+
+    baseline_rate = await _measure(baseline, request, iterations)
+    cached_rate = await _measure(cached, request, iterations)
+
+    print(f'iterations:           {iterations}')
+    print(f'PyJWKClient lookup:   {baseline_rate:10.1f} verifications/sec')
+    print(f'kid-indexed cache:    {cached_rate:10.1f} verifications/sec')
+    print(f'speedup:              {cached_rate / baseline_rate:10.2f}x')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""Benchmark the cost of logging stream events on the caller.
+
+Compares printing every full stream event, as the host used to, with
+`log_event` when the level is disabled, when every event is logged, and
+when a sample of events is logged. Events carry a base64 image like the
+image agent's artifacts. Output goes to /dev/null or to a pipe drained by
+a reader thread, which can be slowed down to mimic a busy log collector.
+
+Run from the client directory:
+
+    uv run python -m benchmarks.logging_overhead --events 2000 --sink pipe
+"""
+
+import asyncio
+import base64
+import contextlib
+import logging
+import os
+import random
+import threading
+import time
+
+import asyncclick as click
+
+from a2a_observability import structured_logging
+from a2a_observability.structured_logging import (
+    configure_logging,
+    log_event,
+    logging_stats,
+)
+
+
+logger = logging.getLogger('benchmarks.logging_overhead')
+
+
+def make_event(i: int, image: str) -> dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': f'request-{i}',
+        'result': {
+            'id': 'task-1',
+            'artifact': {
+                'parts': [
+                    {
+                        'type': 'file',
+                        'file': {
+                            'name': 'generated_image.png',
+                            'mimeType': 'image/png',
+                            'bytes': image,
+                        },
+                    },
+                    {'type': 'text', 'text': f'Update {i}'},
+                ]
+            },
+        },
+    }
+
+
+def open_sink(sink: str, reader_delay: float):
+    if sink == 'devnull':
+        return open(os.devnull, 'w')
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        with os.fdopen(read_fd, 'rb') as reader:
+            while reader.read1(65536):
+                if reader_delay:
+                    time.sleep(reader_delay)
+
+    threading.Thread(target=drain, daemon=True).start()
+    return os.fdopen(write_fd, 'w')
+
+
+def wait_for_writer():
+    while logging_stats()['queued']:
+        time.sleep(0.001)
+
+
+def measure(label: str, events: list[dict], log) -> str:
+    dropped = logging_stats()['dropped']
+    start = time.perf_counter()
+    for event in events:
+        log(event)
+    caller = time.perf_counter() - start
+    wait_for_writer()
+    total = time.perf_counter() - start
+    return (
+        f'{label:<24} caller {caller / len(events) * 1e6:9.1f} us/event'
+        f'   until written {total:7.3f} s'
+        f'   dropped {logging_stats()["dropped"] - dropped}'
+    )
+
+
+@click.command()
+@click.option('--events', default=2000, help='Stream events per variant.')
+@click.option('--image-bytes', default=256 * 1024, help='Image size.')
+@click.option(
+    '--sink', type=click.Choice(['devnull', 'pipe']), default='devnull'
+)
+@click.option(
+    '--reader-delay', default=0.0, help='Seconds the pipe reader sleeps.'
+)
+@click.option('--sample-rate', default=0.1, help='Rate of the sampled run.')
+async def main(
+    events: int,
+    image_bytes: int,
+    sink: str,
+    reader_delay: float,
+    sample_rate: float,
+):
+    image = base64.b64encode(random.randbytes(image_bytes)).decode('utf-8')
+    stream_events = [make_event(i, image) for i in range(events)]
+    output = open_sink(sink, reader_delay)
+    configure_logging('INFO', stream=output)
+
+    def print_event(event: dict):
+        print(f'stream event => {event}')
+
+    def log_stream_event(event: dict):
+        log_event(logger, logging.DEBUG, 'stream_event', response=event)
+
+    print(f'events: {events} with {image_bytes} byte images, sink: {sink}')
+    # Printed events go to the sink; the report itself goes to stdout.
+    with contextlib.redirect_stdout(output):
+        report = measure('print', stream_events, print_event)
+        output.flush()
+    print(report)
+    logger.setLevel(logging.INFO)
+    print(measure('log_event (disabled)', stream_events, log_stream_event))
+    logger.setLevel(logging.DEBUG)
+    print(measure('log_event', stream_events, log_stream_event))
+    structured_logging.sampler.rates['stream_event'] = sample_rate
+    print(
+        measure(
+            f'log_event ({sample_rate:g} rate)', stream_events, log_stream_event
+        )
+    )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
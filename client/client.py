@@ -15,6 +15,7 @@ from starlette.responses import Response
 from common.client import A2ACardResolver, A2AClient
 from common.types import TaskState
 from common.utils.push_notification_auth import PushNotificationReceiverAuth
+from push_auth import CachedPushNotificationReceiverAuth
 
 
 class PushNotificationListener:
@@ -115,10 +116,11 @@ async def cli(
     notification_receiver_port = notif_receiver_parsed.port
 
     if use_push_notifications:
-        notification_receiver_auth = PushNotificationReceiverAuth()
-        await notification_receiver_auth.load_jwks(
+        notification_receiver_auth = CachedPushNotificationReceiverAuth()
+        if not await notification_receiver_auth.load_jwks(
             f'{agent}/.well-known/jwks.json'
-        )
+        ):
+            print('failed to load the agent JWKS; retrying on notifications')
 
         push_notification_listener = PushNotificationListener(
             host=notification_receiver_host,
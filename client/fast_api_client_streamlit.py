@@ -2,17 +2,32 @@ import base64
 from datetime import datetime
 import io
 import json
+import logging
 import queue
 import time
 from PIL import Image
 import requests
 import asyncio
 import threading
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, Optional
+from uuid import uuid4
 
 import streamlit as st
 from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
+from a2a_observability.structured_logging import configure_logging, log_event
+from a2a_observability.tracing import (
+    TRACEPARENT_KEY,
+    configure_tracing,
+    current_traceparent,
+    start_span,
+)
+
+
+configure_logging()
+configure_tracing('a2a-host')
+logger = logging.getLogger(__name__)
+
 
 SPINNER = '<div class="spinner-border" role="status"><span class="visually-hidden">Processing...</span></div>'
 
@@ -24,24 +39,39 @@ class A2AApiClient:
         self.max_retries = max_retries
         self.timeout = timeout
     
-    async def send_message_sse(self, history: List[Dict[str, Any]]) -> AsyncGenerator[Dict[str, Any], None]:
+    async def send_message_sse(self, history: List[Dict[str, Any]], form: Optional[Dict[str, Any]] = None, conversation_id: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Send a message to the chat API endpoint and yield responses as they stream in.
         
         Args:
             history: List of message objects in the conversation history
+            form: Submitted form ({"agent", "taskId", "data"}), routed by the
+                host directly to the agent that issued it
+            conversation_id: Lets the host continue tasks waiting for input
             
         Yields:
             Dictionary containing the response message data
         """
+        with start_span("streamlit.chat", conversation_id=conversation_id):
+            async for message in self._send_message_sse(history, form, conversation_id):
+                yield message
+
+    async def _send_message_sse(self, history: List[Dict[str, Any]], form: Optional[Dict[str, Any]], conversation_id: Optional[str]) -> AsyncGenerator[Dict[str, Any], None]:
+        payload = {"history": history}
+        if form is not None:
+            payload["form"] = form
+        if conversation_id is not None:
+            payload["conversationId"] = conversation_id
+        # ホストはこのヘッダーからトレースを継続する
+        headers = {"Accept": "text/event-stream", TRACEPARENT_KEY: current_traceparent()}
         retries = 0
         while retries <= self.max_retries:
             try:
                 response = requests.post(
                     self.chat_endpoint,
-                    json={"history": history},
+                    json=payload,
                     stream=True,
-                    headers={"Accept": "text/event-stream"},
+                    headers=headers,
                     timeout=self.timeout
                 )
                 
@@ -54,8 +84,7 @@ class A2AApiClient:
                             try:
                                 yield json.loads(data)
                             except json.JSONDecodeError as e:
-                                print(f"Failed to parse event data: {data}")
-                                print(f"Error: {e}")
+                                log_event(logger, logging.WARNING, "invalid_event", data=data, error=str(e))
                 
                 # If we get here without exceptions, we're done
                 break
@@ -63,18 +92,18 @@ class A2AApiClient:
             except requests.exceptions.ChunkedEncodingError:
                 retries += 1
                 if retries > self.max_retries:
-                    print(f"Connection ended prematurely after {self.max_retries} retries.")
+                    logger.warning(f"Connection ended prematurely after {self.max_retries} retries.")
                     break
                 else:
                     wait_time = retries * 1.5  # Exponential backoff
-                    print(f"Connection ended prematurely. Retrying ({retries}/{self.max_retries}) in {wait_time:.1f} seconds...")
+                    logger.warning(f"Connection ended prematurely. Retrying ({retries}/{self.max_retries}) in {wait_time:.1f} seconds...")
                     await asyncio.sleep(wait_time)
                     # Continue to retry
             except requests.exceptions.RequestException as e:
-                print(f"Request error in send_message_sse: {e}")
+                logger.error(f"Request error in send_message_sse: {e}")
                 raise e
             except Exception as e:
-                print(f"Error in send_message_sse: {e}")
+                logger.error(f"Error in send_message_sse: {e}")
                 raise e
 
 
@@ -82,6 +111,7 @@ class A2AApiClient:
 if "messages" not in st.session_state:
     st.session_state.client = A2AApiClient()
     st.session_state.messages = []
+    st.session_state.conversation_id = uuid4().hex
     st.session_state.display_messages = []
     st.session_state.message_id_map = {}
     st.session_state.processing_message = {}
@@ -98,18 +128,47 @@ def format_parts_from_a2a(parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             formatted_parts.append({"text": part["text"]})
         elif "file" in part.get("type", ""):
             if part.get("file", {}).get("mimeType", "").startswith("image/"):
-                formatted_parts.append({
-                    "inline_data": {
-                        "mime_type": part["file"]["mimeType"], 
-                        "data": part["file"]["bytes"]
-                    }
-                })
+                if part["file"].get("uri"):
+                    # 画像はURIで受け取り、表示時にのみ取得する
+                    formatted_parts.append({
+                        "image_url": part["file"]["uri"],
+                        "mime_type": part["file"]["mimeType"],
+                        "name": part["file"].get("name"),
+                    })
+                else:
+                    formatted_parts.append({
+                        "inline_data": {
+                            "mime_type": part["file"]["mimeType"], 
+                            "data": part["file"]["bytes"]
+                        }
+                    })
         else:
             formatted_parts.append(part)
     return formatted_parts
 
-async def backend_process():
-    print("Starting backend process")
+
+def to_history_parts(parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert display parts into parts the host's routing model accepts."""
+    history_parts = []
+    for part in parts:
+        if "data" in part:
+            history_parts.append({"text": f"Form data: {part['data']}"})
+        elif "image_url" in part:
+            history_parts.append({"text": f"Image: {part.get('name') or part['image_url']}"})
+        else:
+            history_parts.append(part)
+    return history_parts
+
+
+def to_form_values(form: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert widget values (e.g. dates) into JSON-serializable values."""
+    return {
+        key: value.isoformat() if hasattr(value, "isoformat") else value
+        for key, value in form.items()
+    }
+
+async def backend_process(form: Optional[Dict[str, Any]] = None):
+    logger.debug("Starting backend process")
     try:
         st.session_state.backend_process_running = True
         connection_success = False
@@ -124,7 +183,7 @@ async def backend_process():
         })
         st.session_state.rerun_queue.put(1)
         
-        async for response in st.session_state.client.send_message_sse(st.session_state.messages):
+        async for response in st.session_state.client.send_message_sse(st.session_state.messages, form, st.session_state.conversation_id):
             connection_success = True  # 少なくとも1つのレスポンスを受け取った
             st.session_state.backend_process_running = True
             # Print the response data
@@ -135,13 +194,18 @@ async def backend_process():
                 # Handle A2A message
                 message_id = response.get("messageId", None)
                 parts = format_parts_from_a2a(response.get("parts", []))
+                for part in parts:
+                    if "data" in part:
+                        # フォームの送信先タスクとエージェントを保持する
+                        part["task_id"] = response.get("taskId")
+                        part["agent"] = response.get("agent")
                 hidden = response.get("hidden", False)
                 if message_id is not None:
                     if message_id not in st.session_state.message_id_map:
                         st.session_state.message_id_map[message_id] = chat_idx
                         st.session_state.messages[chat_idx] = {
                             "role": "model",
-                            "parts": [part if "data" not in part else {"text": f"Form data: {part['data']}"} for part in parts]
+                            "parts": to_history_parts(parts)
                         }
                         st.session_state.display_messages[chat_idx] = {
                             "role": "assistant",
@@ -155,7 +219,7 @@ async def backend_process():
                         if hidden:
                             st.session_state.messages[message_index] = {
                                 "role": message_.get("role", "model"),
-                                "parts": message_["parts"] + [part if "data" not in part else {"text": f"Form data: {part['data']}"} for part in parts]
+                                "parts": message_["parts"] + to_history_parts(parts)
                             }
                             # del st.session_state.processing_message[message_index]
                             st.session_state.processing_message[message_index] = False
@@ -163,7 +227,7 @@ async def backend_process():
                         else:
                             st.session_state.messages[message_index] = {
                                 "role": message_.get("role", "model"),
-                                "parts": message_.get("parts", []) + [part if "data" not in part else {"text": f"Form data: {part['data']}"} for part in parts]
+                                "parts": message_.get("parts", []) + to_history_parts(parts)
                             }
                             st.session_state.display_messages[message_index] = {
                                 "role": "assistant",
@@ -171,38 +235,26 @@ async def backend_process():
                             }
                             st.session_state.processing_message[message_index] = True
                             st.session_state.rerun_queue.put(1)
-                for part in parts:
-                    if "text" in part:
-                        print(f"A2A Message: {part['text']}")
-                    elif "inline_data" in part and part["inline_data"].get("mime_type", "").startswith("image/"):
-                        print(f"A2A Image: {part['inline_data']['data'][:30]}...")
-                    elif "data" in part and part["data"].get("type") == "form":
-                        print(f"A2A Form: {part['data']['form']}")
-                        
+                log_event(logger, logging.DEBUG, "a2a_response", agent=response.get("agent"), message_id=message_id, parts=parts)
+
             elif response.get("message_type") == "chat":
                 # Handle chat message
                 parts = format_parts_from_a2a(response.get("parts", []))
                 st.session_state.messages[chat_idx] = {
                     "role": "model",
-                    "parts": [part if "data" not in part else {"text": f"Form data: {part['data']}"} for part in parts]
+                    "parts": to_history_parts(parts)
                 }
                 st.session_state.display_messages[chat_idx] = {
                     "role": "assistant",
                     "content": parts[-1]
                 }
                 st.session_state.rerun_queue.put(1)
-                for part in parts:
-                    if "text" in part:
-                        print(f"Chat Message: {part['text']}")
-                    elif "inline_data" in part and part["inline_data"].get("mime_type", "").startswith("image/"):
-                        print(f"Chat Image: {message_id}")
-                    elif "data" in part and part["data"].get("type") == "form":
-                        print(f"Chat Form: {message_id}")
-                        
+                log_event(logger, logging.DEBUG, "chat_response", message_id=response.get("messageId"), parts=parts)
+
 
         # もし接続が成功したが応答が受け取れなかった場合
         if not connection_success:
-            print("No responses received from API. Check if the server is running correctly.")
+            logger.warning("No responses received from API. Check if the server is running correctly.")
             # エラーメッセージを表示
             if st.session_state.messages and st.session_state.messages[-1]["role"] == "user":
                 st.session_state.messages.append({
@@ -216,7 +268,7 @@ async def backend_process():
                 st.session_state.rerun_queue.put(1)
                 
     except Exception as e:
-        print(f"Error in backend_process: {e}")
+        logger.error(f"Error in backend_process: {e}")
         # エラーが発生した場合にメッセージを表示
         if st.session_state.messages and st.session_state.messages[-1]["role"] == "user":
             st.session_state.messages.append({
@@ -239,28 +291,29 @@ def backend_queue_watcher():
             # Wait for a new item in the queue (blocking)
             item = st.session_state.queue.get(block=True)
             
-            print("thread start")
-            thread = threading.Thread(target=backend_process_thread, daemon=True)
+            logger.debug("Backend thread starting")
+            thread = threading.Thread(target=backend_process_thread, args=(item,), daemon=True)
             # Attach the script run context to the threads
             ctx = get_script_run_ctx()
             add_script_run_ctx(thread, ctx)
             # Start threads
             thread.start()
-            print("thread end")
+            logger.debug("Backend thread started")
         except queue.Empty:
             continue  # No item, just loop again
         except Exception as e:
-            print(f"Error in backend_queue_watcher: {e}")
+            logger.error(f"Error in backend_queue_watcher: {e}")
             # Sleep briefly to avoid tight error loops
             time.sleep(1)
 
 
-def backend_process_thread():
+def backend_process_thread(item=None):
     """Thread that watches st.session_state.queue and runs backend_process for each item."""
+    form = item.get("form") if isinstance(item, dict) else None
     # グローバルなイベントループオブジェクトを作成
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    loop.run_until_complete(backend_process())
+    loop.run_until_complete(backend_process(form))
     loop.close()
 
 
@@ -376,7 +429,7 @@ def main():
         # メッセージのpartsが空でないことを確認
         if message.get("content"):
             part = message.get("content", {})
-            if "text" in part or "inline_data" in part or "data" in part:
+            if "text" in part or "inline_data" in part or "image_url" in part or "data" in part:
                 with st.chat_message(role):
                     if st.session_state.processing_message.get(index, False):
                         if "text" in part:
@@ -386,6 +439,8 @@ def main():
                             # base64_strをpillowで画像に変換
                             image = Image.open(io.BytesIO(base64.b64decode(bs64_str)))
                             st.image(image)
+                        elif "image_url" in part:
+                            st.image(part["image_url"])
                         elif "data" in part and part["data"].get("type") == "form":
                             form = render_dynamic_form(part["data"]["form"], part["data"]["form_data"], form_key=f"form_{index}", disabled=part.get("disabled", False))
                             forms[index] = form
@@ -397,6 +452,8 @@ def main():
                             # base64_strをpillowで画像に変換
                             image = Image.open(io.BytesIO(base64.b64decode(bs64_str)))
                             st.image(image)
+                        elif "image_url" in part:
+                            st.image(part["image_url"])
                         elif "data" in part and part["data"].get("type") == "form":
                             form = render_dynamic_form(part["data"]["form"], part["data"]["form_data"], form_key=f"form_{index}", disabled=part.get("disabled", False))
                             forms[index] = form
@@ -427,22 +484,33 @@ def main():
                 form_idx = idx
 
         if form_idx is not None:
+            form = to_form_values(form)
+            form_text = json.dumps(form, ensure_ascii=False)
             with st.chat_message("user"):
-                st.write(str(form))
+                st.write(form_text)
             
             # Add to message history
             st.session_state.messages.append({
                 "role": "user",
                 "parts": [
-                    {"text": str(form)}
+                    {"text": f"Form data: {form_text}"}
                 ]
             })
             st.session_state.display_messages.append({
                 "role": "user",
-                "content": {"text": str(form)}
+                "content": {"text": form_text}
             })
-            st.session_state.display_messages[form_idx]["content"]["disabled"] = True
-            st.session_state.queue.put(1)
+            form_part = st.session_state.display_messages[form_idx]["content"]
+            form_part["disabled"] = True
+            item = 1
+            if form_part.get("agent") and form_part.get("task_id"):
+                # 発行元のタスクにフォームを直接返す
+                item = {"form": {
+                    "agent": form_part["agent"],
+                    "taskId": form_part["task_id"],
+                    "data": form,
+                }}
+            st.session_state.queue.put(item)
     else:
         time.sleep(1)
     st.rerun()
@@ -1,13 +1,15 @@
 import asyncio
 import base64
+import logging
 import os
 import threading
-import traceback
+import time
 from typing import Optional, List, Dict, Any
 import urllib
 from uuid import uuid4
 from wsgiref import types
 import json
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 
 import asyncclick as click
@@ -16,17 +18,40 @@ from google.genai import types as genai_types
 from starlette.applications import Starlette
 from starlette.requests import Request
 from starlette.responses import Response
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, Header, WebSocket
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from a2a_observability.genai_replay import wrap_genai_client
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.metrics import install_metrics
+from a2a_observability.structured_logging import (
+    configure_logging,
+    log_event,
+    logging_stats,
+)
+from a2a_observability.tracing import (
+    TRACEPARENT_KEY,
+    configure_tracing,
+    current_traceparent,
+    start_span,
+)
 from common.client import A2ACardResolver, A2AClient
 from common.types import TaskState
 from common.utils.push_notification_auth import PushNotificationReceiverAuth
+from agent_health import AgentHealthMonitor
+from intent_classifier import IntentClassifier
+from metrics import CHAT_ROUTES, CHATS_IN_PROGRESS
+from push_auth import CachedPushNotificationReceiverAuth
+from replica_pool import Replica, ReplicaPool
 
 from dotenv import load_dotenv
 load_dotenv("../.env")
 
+configure_logging()
+configure_tracing('a2a-host')
+logger = logging.getLogger(__name__)
+
 
 # 複数エージェントURLリスト
 AGENT_URLS = [
@@ -35,6 +60,29 @@ AGENT_URLS = [
     "http://localhost:10002",
     # 必要に応じて追加
 ]
+# A comma-separated AGENT_URLS replaces the list. URLs whose agent cards
+# share a name are replicas of one agent, and tasks are balanced across
+# them with REPLICA_BALANCING (least_outstanding or latency_weighted).
+if os.getenv("AGENT_URLS"):
+    AGENT_URLS = [url.strip() for url in os.getenv("AGENT_URLS").split(",") if url.strip()]
+REPLICA_BALANCING = os.getenv("REPLICA_BALANCING", "least_outstanding")
+
+# Ask agents to return images as links to their /files endpoint instead of
+# inline base64 bytes. The Streamlit client fetches them when displaying.
+PREFER_IMAGE_URIS = os.getenv("A2A_PREFER_IMAGE_URIS", "false").lower() == "true"
+
+# Messages the local classifier routes with at least this confidence skip
+# the routing model. Set above 1 to always ask the model.
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
+
+# Agents are probed in the background. An agent that fails
+# AGENT_FAILURE_THRESHOLD times in a row, or takes longer than
+# AGENT_LATENCY_SLO seconds to its first event, is left out of routing for
+# AGENT_OPEN_SECONDS and until a probe reaches it again.
+AGENT_PROBE_INTERVAL = float(os.getenv("AGENT_PROBE_INTERVAL", "5"))
+AGENT_FAILURE_THRESHOLD = int(os.getenv("AGENT_FAILURE_THRESHOLD", "3"))
+AGENT_LATENCY_SLO = float(os.getenv("AGENT_LATENCY_SLO", "30"))
+AGENT_OPEN_SECONDS = float(os.getenv("AGENT_OPEN_SECONDS", "30"))
 
 
 class PushNotificationListener:
@@ -62,9 +110,9 @@ class PushNotificationListener:
                 self.start_server(),
                 self.loop,
             )
-            print('======= push notification listener started =======')
+            logger.info('Push notification listener started')
         except Exception as e:
-            print(e)
+            logger.error(f'Failed to start push notification listener: {e}')
 
     async def start_server(self):
         import uvicorn
@@ -85,9 +133,7 @@ class PushNotificationListener:
 
     async def handle_validation_check(self, request: Request):
         validation_token = request.query_params.get('validationToken')
-        print(
-            f'\npush notification verification received => \n{validation_token}\n'
-        )
+        log_event(logger, logging.INFO, 'push_validation', token=validation_token)
 
         if not validation_token:
             return Response(status_code=400)
@@ -100,14 +146,13 @@ class PushNotificationListener:
             if not await self.notification_receiver_auth.verify_push_notification(
                 request
             ):
-                print('push notification verification failed')
+                logger.warning('Push notification verification failed')
                 return None
         except Exception as e:
-            print(f'error verifying push notification: {e}')
-            print(traceback.format_exc())
+            logger.error(f'Error verifying push notification: {e}', exc_info=True)
             return None
 
-        print(f'\npush notification received => \n{data}\n')
+        log_event(logger, logging.DEBUG, 'push_notification', data=data)
         return Response(status_code=200)
 
 
@@ -116,14 +161,15 @@ async def send_to_agent_(message, client, streaming, use_push_notifications, not
     if taskId is None:
         taskId = uuid4().hex
 
+    # Submitted forms are sent as structured data so the agent does not
+    # have to parse them out of text.
+    if isinstance(message, dict):
+        part = {'type': 'data', 'data': message}
+    else:
+        part = {'type': 'text', 'text': message}
     message = {
         'role': 'user',
-        'parts': [
-            {
-                'type': 'text',
-                'text': message,
-            }
-        ],
+        'parts': [part],
     }
 
     payload = {
@@ -132,6 +178,14 @@ async def send_to_agent_(message, client, streaming, use_push_notifications, not
         'acceptedOutputModes': ['text'],
         'message': message,
     }
+    metadata = {}
+    if PREFER_IMAGE_URIS:
+        metadata['imageOutput'] = {'transfer': 'uri'}
+    # Remote agents continue the trace from the task metadata.
+    if (traceparent := current_traceparent()) is not None:
+        metadata[TRACEPARENT_KEY] = traceparent
+    if metadata:
+        payload['metadata'] = metadata
 
     if use_push_notifications:
         payload['pushNotification'] = {
@@ -148,9 +202,7 @@ async def send_to_agent_(message, client, streaming, use_push_notifications, not
             # result_json = result.model_dump_json(exclude_none=True)
             result_json = result.model_dump(exclude_none=True)
             # result_json = result
-            print(
-                f'stream event => {result_json}'
-            )
+            log_event(logger, logging.DEBUG, 'stream_event', task_id=taskId, response=result_json)
             message_id = result_json.get('id')
             if (artifact := result_json.get('result', {}).get('artifact', None)) is not None:
             # if (artifacts := result_json.artifacts) is not None:
@@ -158,25 +210,25 @@ async def send_to_agent_(message, client, streaming, use_push_notifications, not
                 # parts = artifacts.parts
                 if parts is not None:
                     # yield {"messageId": message_id, "parts": [{"text": part["text"]} for part in parts]}
-                    yield {"messageId": message_id, "parts": parts}
+                    yield {"messageId": message_id, "taskId": taskId, "parts": parts}
             else:
                 parts = result_json.get('result', {}).get('status', {}).get('message', {}).get('parts')
                 # parts = result_json.status.message.parts
                 if parts is not None:
                     # result_parts.extend(parts)
                     # yield {"messageId": message_id, "parts": [{"text": part["text"]} for part in parts]}
-                    yield {"messageId": message_id, "parts": parts}
+                    yield {"messageId": message_id, "taskId": taskId, "parts": parts}
 
         taskResult = await client.get_task({'id': taskId})
     else:
         taskResult = await client.send_task(payload)
         # print(f'\n{taskResult.model_dump_json(exclude_none=True)}')
         data = taskResult.model_dump(exclude_none=True).get("result", {})
-        print(f'data: {str(data)[:500]}')
+        log_event(logger, logging.DEBUG, 'task_result', task_id=taskId, result=data)
         try:
             message_id = data.get("id", None)
         except Exception as e:
-            print(f'error getting message_id: {str(data)[:500]}')
+            log_event(logger, logging.ERROR, 'task_result_error', task_id=taskId, result=data)
             raise e
         parts = []
         if "artifacts" in data:
@@ -197,30 +249,66 @@ async def send_to_agent_(message, client, streaming, use_push_notifications, not
                     #                 }
                     #             })
                     #     elif "data" in part and part["data"].get("type") == "form":
-        yield {"messageId": message_id, "parts": parts}
+        yield {"messageId": message_id, "taskId": taskId, "parts": parts}
 
     ## if the result is that more input is required, loop again.
     state = TaskState(taskResult.result.status.state)
+    log_event(logger, logging.INFO, 'task_state', task_id=taskId, state=state.value)
     if state.name == TaskState.INPUT_REQUIRED.name:
-        print('======= input required =======')
-        yield {"messageId": message_id, "hidden": True, "parts": [{"text": f"TaskId: {taskId}\nInput required"}]}
+        yield {"messageId": message_id, "taskId": taskId, "state": state.value, "hidden": True, "parts": [{"text": f"TaskId: {taskId}\nInput required"}]}
     elif state.name == TaskState.COMPLETED.name:
-        print('======= completed =======')
-        yield {"messageId": message_id, "hidden": True, "parts": [{"text": f"TaskId: {taskId}\nCompleted"}]}
+        yield {"messageId": message_id, "taskId": taskId, "state": state.value, "hidden": True, "parts": [{"text": f"TaskId: {taskId}\nCompleted"}]}
     else:
-        print('======= unknown state =======')
-        yield {"messageId": message_id, "hidden": True, "parts": [{"text": f"TaskId: {taskId}\nUnknown state"}]}
+        yield {"messageId": message_id, "taskId": taskId, "state": state.value, "hidden": True, "parts": [{"text": f"TaskId: {taskId}\nUnknown state"}]}
+
+
+def build_agent_config(tool_declarations, names):
+    """Returns the routing model config offering the given agents."""
+    tool_config = genai_types.ToolConfig(
+        function_calling_config=genai_types.FunctionCallingConfig(
+            mode="ANY", allowed_function_names=names
+        )
+    )
+    tools = genai_types.Tool(function_declarations=[tool_declarations[name] for name in names])
+    return genai_types.GenerateContentConfig(tools=[tools], tool_config=tool_config)
+
+
+def unavailable_reply(name):
+    return {"parts": [{"text": f"{name} is unavailable right now. Please try again later."}], "message_type": "chat"}
+
+
+async def unavailable_stream(name, taskId):
+    yield {"messageId": uuid4().hex, "taskId": taskId, "parts": unavailable_reply(name)["parts"]}
 
 
 async def get_all_agents(agent_urls, session, use_push_notifications, push_notification_receiver):
-    tool_declarations = []
+    tool_declarations = {}
     functions = {}
-    for agent_url in agent_urls:
-        card_resolver = A2ACardResolver(agent_url)
-        card = card_resolver.get_agent_card()
-        notif_receiver_parsed = urllib.parse.urlparse(push_notification_receiver)
-        notification_receiver_host = notif_receiver_parsed.hostname
-        notification_receiver_port = notif_receiver_parsed.port
+    pools = {}
+    notif_receiver_parsed = urllib.parse.urlparse(push_notification_receiver)
+    notification_receiver_host = notif_receiver_parsed.hostname
+    notification_receiver_port = notif_receiver_parsed.port
+    # One key cache serves every agent: keys are looked up by kid, so the
+    # JWKS of all agents can share it.
+    notification_receiver_auth = None
+    if use_push_notifications:
+        notification_receiver_auth = CachedPushNotificationReceiverAuth()
+    classifier = IntentClassifier(threshold=INTENT_CONFIDENCE_THRESHOLD)
+    health = AgentHealthMonitor(
+        probe_interval=AGENT_PROBE_INTERVAL,
+        failure_threshold=AGENT_FAILURE_THRESHOLD,
+        latency_slo=AGENT_LATENCY_SLO,
+        open_seconds=AGENT_OPEN_SECONDS,
+    )
+
+    async def add_agent(agent_url, card):
+        if notification_receiver_auth and card.capabilities.pushNotifications:
+            if not await notification_receiver_auth.load_jwks(
+                f'{agent_url}/.well-known/jwks.json'
+            ):
+                # Later refreshes retry the URL; until then notifications
+                # from this agent fail to verify.
+                logger.warning(f'Could not load the JWKS of {agent_url}')
 
         client = A2AClient(agent_card=card)
         if session == 0:
@@ -249,65 +337,228 @@ async def get_all_agents(agent_urls, session, use_push_notifications, push_notif
                 "required": ["message"],
             },
         }
-        async def make_send_to_agent(client, streaming, notification_receiver_host, notification_receiver_port, sessionId, use_push_notifications):
-            async def send_to_agent(message, taskId: Optional[str] = None):
+        async def make_send_to_replica(client, streaming, notification_receiver_host, notification_receiver_port, sessionId, use_push_notifications):
+            def send_to_replica(message: str | Dict[str, Any], taskId: str):
                 return send_to_agent_(message, client, streaming, use_push_notifications, notification_receiver_host, notification_receiver_port, sessionId, taskId)
+            return send_to_replica
+        send_to_replica = await make_send_to_replica(client, streaming, notification_receiver_host, notification_receiver_port, sessionId, use_push_notifications)
+        replica = Replica(agent_url, send_to_replica)
+        health.add_agent(card_function, agent_url)
+        if card_function in pools:
+            # Another replica of a known agent
+            pools[card_function].add_replica(replica)
+            return
+        pool = ReplicaPool(card_function, strategy=REPLICA_BALANCING)
+        pool.add_replica(replica)
+
+        async def make_send_to_agent(name, pool):
+            async def send_to_agent(message: str | Dict[str, Any], taskId: Optional[str] = None, conversation_id: Optional[str] = None):
+                replica = pool.choose(conversation_id, taskId, health.allow_replica)
+                if replica is None:
+                    return unavailable_stream(name, taskId)
+                if taskId is None:
+                    taskId = uuid4().hex
+                return health.track(replica.url, pool.track(replica, taskId, replica.send(message, taskId)))
             return send_to_agent
-        send_to_agent = await make_send_to_agent(client, streaming, notification_receiver_host, notification_receiver_port, sessionId, use_push_notifications)
-        tool_declarations.append(function_declaration)
+        send_to_agent = await make_send_to_agent(card_function, pool)
+        pools[card_function] = pool
+        tool_declarations[card_function] = function_declaration
         functions[card_function] = send_to_agent
+        classifier.add_agent(card_function, card)
 
-    tool_config = genai_types.ToolConfig(
-        function_calling_config=genai_types.FunctionCallingConfig(
-            mode="ANY", allowed_function_names=list(functions.keys())
+    for agent_url in agent_urls:
+        try:
+            card = A2ACardResolver(agent_url).get_agent_card()
+        except Exception as e:
+            # Added once a health probe reaches it.
+            logger.warning(f"Agent at {agent_url} is unreachable: {e}")
+            health.watch(agent_url)
+            continue
+        await add_agent(agent_url, card)
+    health.on_discover = add_agent
+    health.start()
+
+    if notification_receiver_auth:
+        push_notification_listener = PushNotificationListener(
+            host=notification_receiver_host,
+            port=notification_receiver_port,
+            notification_receiver_auth=notification_receiver_auth,
         )
-    )
-    tools = genai_types.Tool(function_declarations=tool_declarations)
-    config = genai_types.GenerateContentConfig(tools=[tools], tool_config=tool_config)
-    host_model = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+        push_notification_listener.start()
+
+    host_model = wrap_genai_client(lambda: genai.Client(api_key=os.getenv("GOOGLE_API_KEY")))
     return {
         "host_agent": host_model,
-        "agent_config": config,
+        "tool_declarations": tool_declarations,
         "functions": functions,
+        "classifier": classifier,
+        "health": health,
+        "pools": pools,
     }
 
 session = 0
 use_push_notifications = False
 push_notification_receiver = 'http://localhost:5000'
 host_agent = None
-agent_config = None
+tool_declarations = None
 functions = None
+classifier = None
+health = None
+pools = None
 
 async def get_agent_resources():
-    global host_agent, agent_config, functions
+    global host_agent, tool_declarations, functions, classifier, health, pools
     if host_agent is None:
         agent_info = await get_all_agents(AGENT_URLS, session, use_push_notifications, push_notification_receiver)
         host_agent = agent_info["host_agent"]
-        agent_config = agent_info["agent_config"]
+        tool_declarations = agent_info["tool_declarations"]
         functions = agent_info["functions"]
-    return {"host_agent": host_agent, "agent_config": agent_config, "functions": functions}
-
-async def main(history):
+        classifier = agent_info["classifier"]
+        health = agent_info["health"]
+        pools = agent_info["pools"]
+    return {"host_agent": host_agent, "tool_declarations": tool_declarations, "functions": functions, "classifier": classifier, "health": health, "pools": pools}
+
+
+def get_user_text(history) -> Optional[str]:
+    """Returns the text of the latest message if it is a user message."""
+    if not history or history[-1].get("role") != "user":
+        return None
+    texts = [part["text"] for part in history[-1].get("parts", []) if "text" in part]
+    return "\n".join(texts) or None
+
+# Tasks waiting for user input, by conversation id and then agent function:
+# (task id, time the agent asked). A later turn that the classifier does
+# not clearly route elsewhere continues the task directly. A record is kept
+# until its task ends or PENDING_INPUT_TTL seconds pass, so a task survives
+# turns that go to other agents or while its agent is unavailable.
+MAX_PENDING_INPUTS = 10000
+PENDING_INPUT_TTL = float(os.getenv("PENDING_INPUT_TTL", str(60 * 60)))
+pending_inputs: "OrderedDict[str, dict[str, tuple[str, float]]]" = OrderedDict()
+
+
+def find_pending_input(conversation_id: Optional[str], name: Optional[str], allow) -> Optional[tuple[str, str]]:
+    """Returns the (agent function, task id) a turn should continue.
+
+    With no classified agent, the most recent task waiting for input is
+    continued; otherwise only that agent's task. `allow` tells whether an
+    agent is available.
+    """
+    tasks = pending_inputs.get(conversation_id) if conversation_id else None
+    if not tasks:
+        return None
+    now = time.monotonic()
+    for agent, (_, asked_at) in list(tasks.items()):
+        if now - asked_at > PENDING_INPUT_TTL:
+            del tasks[agent]
+    if not tasks:
+        del pending_inputs[conversation_id]
+        return None
+    candidates = reversed(tasks) if name is None else [name]
+    for agent in candidates:
+        if agent in tasks and allow(agent):
+            return agent, tasks[agent][0]
+    return None
+
+
+def record_task_state(conversation_id: str, name: str, task_id: str, state: str):
+    tasks = pending_inputs.get(conversation_id)
+    if state == TaskState.INPUT_REQUIRED.value:
+        if tasks is None:
+            tasks = pending_inputs[conversation_id] = {}
+        # Re-inserted so the newest waiting task comes last.
+        tasks.pop(name, None)
+        tasks[name] = (task_id, time.monotonic())
+        pending_inputs.move_to_end(conversation_id)
+        while len(pending_inputs) > MAX_PENDING_INPUTS:
+            pending_inputs.popitem(last=False)
+    elif tasks and tasks.get(name, (None,))[0] == task_id:
+        # Only the task that asked for input is done with it; other tasks
+        # of the conversation keep waiting.
+        del tasks[name]
+        if not tasks:
+            del pending_inputs[conversation_id]
+
+
+async def relay_agent(name, stream, conversation_id: Optional[str]):
+    """Relays an agent's events and records tasks that wait for input."""
+    with start_span("a2a.task", agent=name) as span:
+        async for result in stream:
+            span.set_attribute("task_id", result.get("taskId"))
+            if conversation_id is not None and (state := result.get("state")):
+                record_task_state(conversation_id, name, result["taskId"], state)
+            yield result | {"message_type": "a2a", "agent": name}
+
+
+async def main(history, form: Optional["FormSubmission"] = None, conversation_id: Optional[str] = None):
     resources = await get_agent_resources()
     host_agent = resources["host_agent"]
-    agent_config = resources["agent_config"]
+    tool_declarations = resources["tool_declarations"]
     functions = resources["functions"]
-    response = host_agent.models.generate_content(
-        model="gemini-2.5-flash-preview-04-17",
-        config=agent_config, 
-        contents=history
-    )
+    health = resources["health"]
+    if form is not None and form.agent in functions:
+        # A submitted form belongs to the task that issued it, so it goes
+        # straight back to that agent without asking the routing model.
+        log_event(logger, logging.INFO, "route", route="form", agent=form.agent, task_id=form.taskId)
+        CHAT_ROUTES.labels("form").inc()
+        if not health.allow(form.agent):
+            yield unavailable_reply(form.agent)
+            return
+        stream = await functions[form.agent](form.data, form.taskId, conversation_id)
+        async for result in relay_agent(form.agent, stream, conversation_id):
+            yield result
+        return
+    if (text := get_user_text(history)) is not None:
+        with start_span("host.classify") as span:
+            name, confidence = resources["classifier"].classify(text)
+            span.set_attribute("agent", name)
+            span.set_attribute("confidence", confidence)
+        if name is not None and not health.allow(name):
+            name = None
+        pending = find_pending_input(conversation_id, name, lambda agent: agent in functions and health.allow(agent))
+        if pending is not None:
+            # The agent asked for input; continue its task unless the
+            # message clearly belongs to another agent.
+            name, taskId = pending
+            log_event(logger, logging.INFO, "route", route="pending", agent=name, task_id=taskId)
+            CHAT_ROUTES.labels("pending").inc()
+            stream = await functions[name](text, taskId, conversation_id)
+            async for result in relay_agent(name, stream, conversation_id):
+                yield result
+            return
+        if name is not None:
+            log_event(logger, logging.INFO, "route", route="classifier", agent=name, confidence=confidence)
+            CHAT_ROUTES.labels("classifier").inc()
+            stream = await functions[name](text, conversation_id=conversation_id)
+            async for result in relay_agent(name, stream, conversation_id):
+                yield result
+            return
+    CHAT_ROUTES.labels("model").inc()
+    # Agents with an open circuit are not offered to the model.
+    available = health.available(functions)
+    if not available:
+        yield {"parts": [{"text": "No agents are available right now. Please try again later."}], "message_type": "chat"}
+        return
+    with start_span("host.routing_model"):
+        # The genai client blocks, so it is called from a thread to keep
+        # other conversations moving.
+        response = await asyncio.to_thread(
+            host_agent.models.generate_content,
+            model="gemini-2.5-flash-preview-04-17",
+            config=build_agent_config(tool_declarations, available), 
+            contents=history
+        )
     if (function_call:=response.candidates[0].content.parts[0].function_call):
         name = function_call.name
         args = function_call.args
-        print(f"Function call: {name} with args: {args}")
-        print("-"*100)
-        if name in functions:
-            stream = await functions[name](**args)
-            async for result in stream:
-                yield result | {"message_type": "a2a"}
+        log_event(logger, logging.INFO, "route", route="model", agent=name, args=args)
+        if name in functions and not health.allow(name):
+            yield unavailable_reply(name)
+        elif name in functions:
+            stream = await functions[name](**args, conversation_id=conversation_id)
+            async for result in relay_agent(name, stream, conversation_id):
+                yield result
         else:
-            print(f"Error: {name} is not a valid function")
+            logger.error(f"Error: {name} is not a valid function")
             yield {"parts": [{"text": f"Error: {name} is not a valid function"}], "message_type": "chat"}
     else:
         yield {"messageId": uuid4().hex, "parts": [{"text": response.text}], "message_type": "chat"}
@@ -315,25 +566,55 @@ async def main(history):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: initialize agent resources
-    global host_agent, agent_config, functions
+    global host_agent, tool_declarations, functions, classifier, health, pools
     agent_info = await get_all_agents(AGENT_URLS, session, use_push_notifications, push_notification_receiver)
     host_agent = agent_info["host_agent"]
-    agent_config = agent_info["agent_config"]
+    tool_declarations = agent_info["tool_declarations"]
     functions = agent_info["functions"]
+    classifier = agent_info["classifier"]
+    health = agent_info["health"]
+    pools = agent_info["pools"]
     yield
-    # Shutdown: cleanup could be added here if needed
+    # Shutdown: stop probing the agents
+    await health.aclose()
+
+def replica_stats():
+    stats = {}
+    for pool in (pools or {}).values():
+        for key, value in pool.stats().items():
+            stats[key] = stats.get(key, 0) + value
+    return stats
 
 # FastAPI app
 app = FastAPI(lifespan=lifespan)
+install_metrics(
+    app,
+    stats={
+        "host": lambda: {"pending_inputs": sum(map(len, list(pending_inputs.values())))},
+        "intent_classifier": lambda: classifier.stats() if classifier else {},
+        "agent_health": lambda: health.stats() if health else {},
+        "replica_pools": replica_stats,
+        "llm_replay": replay_store.stats,
+        "logging": logging_stats,
+    },
+)
+
+class FormSubmission(BaseModel):
+    agent: str
+    taskId: str
+    data: Dict[str, Any]
 
 class ChatRequest(BaseModel):
     history: List[Dict[str, Any]]
+    form: Optional[FormSubmission] = None
+    conversationId: Optional[str] = None
 
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, traceparent: Optional[str] = Header(default=None)):
     async def generate():
-        async for result in main(request.history):
-            yield f"data: {json.dumps(result)}\n\n"
+        with start_span("host.chat", traceparent=traceparent, conversation_id=request.conversationId), CHATS_IN_PROGRESS.track_inprogress():
+            async for result in main(request.history, request.form, request.conversationId):
+                yield f"data: {json.dumps(result)}\n\n"
     
     return StreamingResponse(
         generate(),
@@ -0,0 +1,179 @@
+"""Local intent classifier used to route messages without a model call."""
+
+import logging
+import math
+import re
+import threading
+import time
+
+from collections import Counter, defaultdict
+
+from common.types import AgentCard
+
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r'\w+')
+# CJK text has no spaces, so it is scored by character bigrams.
+_CJK_PATTERN = re.compile(r'[぀-ヿ㐀-鿿豈-﫿]')
+_STOP_WORDS = frozenset(
+    'a an and are as at be by can do for from i in is it me my of on or '
+    'please the this to was what with you your'.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Returns the unigrams and bigrams of the text."""
+    terms = []
+    words = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.search(word):
+            if len(word) == 1:
+                terms.append(word)
+            terms.extend(word[i : i + 2] for i in range(len(word) - 1))
+            continue
+        if word in _STOP_WORDS:
+            continue
+        words.append(word)
+    terms.extend(words)
+    terms.extend(f'{a} {b}' for a, b in zip(words, words[1:]))
+    return terms
+
+
+class IntentClassifier:
+    """Scores a message against the skills advertised in agent cards.
+
+    Every agent gets a weighted bag of n-grams built from its card; skill
+    tags and examples count more than descriptions. A message is scored per
+    agent as the sum of the TF-IDF weights of its n-grams, and the
+    confidence is the best agent's margin over the runner-up, as a share of
+    the best score. Each agent has a score floor: `floor_ratio` times the
+    lowest score of its own skill examples, and at least `min_score`. A
+    best score below the floor scales the confidence down, and a message is
+    only routed when its confidence reaches `threshold` and its score
+    reaches the floor, so a single generic word shared with a card does not
+    route. Everything else is left to the routing model.
+    """
+
+    NAME_WEIGHT = 1.0
+    DESCRIPTION_WEIGHT = 1.0
+    TAG_WEIGHT = 3.0
+    EXAMPLE_WEIGHT = 2.0
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        floor_ratio: float = 0.25,
+        min_score: float = 1.0,
+    ):
+        self.threshold = threshold
+        self.floor_ratio = floor_ratio
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self._term_counts: dict[str, Counter] = {}
+        self._examples: dict[str, list[str]] = {}
+        self._weights: dict[str, dict[str, float]] = {}
+        self._floors: dict[str, float] = {}
+        self.routed = 0
+        self.fallbacks = 0
+        self.total_latency = 0.0
+
+    def add_agent(self, name: str, card: AgentCard):
+        terms = Counter()
+
+        def add(text: str | None, weight: float):
+            for term in tokenize(text or ''):
+                terms[term] += weight
+
+        add(card.name, self.NAME_WEIGHT)
+        add(card.description, self.DESCRIPTION_WEIGHT)
+        for skill in card.skills:
+            add(skill.name, self.NAME_WEIGHT)
+            add(skill.description, self.DESCRIPTION_WEIGHT)
+            for tag in skill.tags or []:
+                add(tag, self.TAG_WEIGHT)
+            for example in skill.examples or []:
+                add(example, self.EXAMPLE_WEIGHT)
+        self._term_counts[name] = terms
+        self._examples[name] = [
+            example for skill in card.skills for example in skill.examples or []
+        ]
+        self._build()
+
+    def _build(self):
+        document_frequency = Counter()
+        for terms in self._term_counts.values():
+            document_frequency.update(terms.keys())
+        agents = len(self._term_counts)
+        weights = {}
+        for name, terms in self._term_counts.items():
+            norm = math.sqrt(sum(count * count for count in terms.values()))
+            weights[name] = {
+                term: (count / norm)
+                * math.log(1 + agents / document_frequency[term])
+                * 10
+                for term, count in terms.items()
+            }
+        self._weights = weights
+        floors = {}
+        for name, examples in self._examples.items():
+            floor = self.min_score
+            example_scores = [self.scores(e).get(name, 0.0) for e in examples]
+            if example_scores:
+                floor = max(floor, self.floor_ratio * min(example_scores))
+            floors[name] = floor
+        self._floors = floors
+
+    def scores(self, text: str) -> dict[str, float]:
+        scores = defaultdict(float)
+        for term in set(tokenize(text)):
+            for name, weights in self._weights.items():
+                if term in weights:
+                    scores[name] += weights[term]
+        return dict(scores)
+
+    def classify(self, text: str) -> tuple[str | None, float]:
+        """Returns the agent to route to and the confidence.
+
+        The agent is None when the message is ambiguous.
+        """
+        start = time.perf_counter()
+        scores = self.scores(text)
+        name, confidence = None, 0.0
+        if scores:
+            best, *rest = sorted(scores, key=scores.get, reverse=True)
+            runner_up = scores[rest[0]] if rest else 0.0
+            floor = self._floors.get(best, self.min_score)
+            # Scores below the floor scale the confidence down.
+            confidence = (
+                (scores[best] - runner_up)
+                / scores[best]
+                * min(1.0, scores[best] / floor)
+            )
+            if confidence >= self.threshold and scores[best] >= floor:
+                name = best
+        latency = time.perf_counter() - start
+        with self._lock:
+            if name is None:
+                self.fallbacks += 1
+            else:
+                self.routed += 1
+            self.total_latency += latency
+        logger.debug(
+            'Intent %s (confidence %.2f, %.3f ms)',
+            name or 'ambiguous',
+            confidence,
+            latency * 1000,
+        )
+        return name, confidence
+
+    def stats(self) -> dict[str, float]:
+        classified = self.routed + self.fallbacks
+        return {
+            'routed': self.routed,
+            'fallbacks': self.fallbacks,
+            'hit_rate': self.routed / classified if classified else 0.0,
+            'avg_latency_ms': (
+                self.total_latency / classified * 1000 if classified else 0.0
+            ),
+        }
@@ -0,0 +1,16 @@
+"""Prometheus metrics of the host.
+
+The shared metrics and `install_metrics` are in `a2a_observability.metrics`.
+"""
+
+from prometheus_client import Counter, Gauge
+
+
+CHAT_ROUTES = Counter(
+    'a2a_host_chat_routes_total',
+    'Chat turns by how they were routed: form, pending, classifier or model.',
+    ['route'],
+)
+CHATS_IN_PROGRESS = Gauge(
+    'a2a_host_chats_in_progress', 'Chat turns currently being streamed.'
+)
@@ -0,0 +1,198 @@
+"""Push notification verification backed by a kid-indexed JWKS cache."""
+
+import asyncio
+import logging
+import time
+
+import httpx
+import jwt
+
+from jwt import PyJWK, PyJWKSet
+from starlette.requests import Request
+
+from common.utils.push_notification_auth import (
+    AUTH_HEADER_PREFIX,
+    PushNotificationReceiverAuth,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPushNotificationReceiverAuth(PushNotificationReceiverAuth):
+    """Verifies push notifications against cached, pre-parsed JWKS keys.
+
+    Keys from every loaded JWKS URL are parsed once and indexed by `kid`, so
+    verifying a notification is a dictionary lookup plus a signature check.
+    The key set is refreshed in the background once it is older than
+    `refresh_interval`, and immediately when a token carries an unknown
+    `kid` (at most once per `min_refresh_interval`, so forged kids cannot
+    trigger a fetch per request).
+
+    Keys are kept per URL, and a refresh replaces the keys of every URL it
+    could fetch; a URL whose fetch failed keeps its previous keys. Keys
+    that the last refresh removed stay valid for `key_grace_period`
+    seconds, so notifications signed just before a rotation still verify.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 300.0,
+        min_refresh_interval: float = 10.0,
+        max_token_age: float = 300.0,
+        key_grace_period: float = 300.0,
+    ):
+        super().__init__()
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.max_token_age = max_token_age
+        self.key_grace_period = key_grace_period
+        self.jwks_urls: list[str] = []
+        # JWKS URL (or '' for documents added directly) -> keys by kid.
+        self._url_keys: dict[str, dict[str, PyJWK]] = {}
+        self._keys: dict[str, PyJWK] = {}
+        # Keys removed by the last refresh, by kid, with their expiry time.
+        self._retired: dict[str, tuple[PyJWK, float]] = {}
+        self._loaded_at = 0.0
+        self._last_refresh_attempt = 0.0
+        self._background_refresh: asyncio.Task | None = None
+
+    async def load_jwks(self, jwks_url: str) -> bool:
+        """Adds a JWKS URL to the cache and loads its keys.
+
+        Only the added URL is fetched; the others are left to the periodic
+        refresh. Returns whether the keys could be loaded. A URL that
+        failed stays registered and is retried by later refreshes.
+        """
+        if jwks_url not in self.jwks_urls:
+            self.jwks_urls.append(jwks_url)
+        async with httpx.AsyncClient(timeout=10) as client:
+            keys = await self._fetch(client, jwks_url)
+        if keys is None:
+            return False
+        self._url_keys[jwks_url] = keys
+        self._rebuild_keys()
+        self._loaded_at = time.monotonic()
+        return True
+
+    def add_jwks(self, jwks: dict):
+        """Adds the keys of an already fetched JWKS document to the cache."""
+        self._url_keys[''] = self._url_keys.get('', {}) | self._parse(jwks)
+        self._rebuild_keys()
+        self._loaded_at = time.monotonic()
+
+    async def _refresh(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not force and now - self._last_refresh_attempt < (
+            self.min_refresh_interval
+        ):
+            return False
+        self._last_refresh_attempt = now
+
+        fetched: dict[str, dict[str, PyJWK]] = {}
+        async with httpx.AsyncClient(timeout=10) as client:
+            for url in self.jwks_urls:
+                keys = await self._fetch(client, url)
+                if keys is not None:
+                    fetched[url] = keys
+        if not fetched:
+            return False
+
+        previous = self._keys
+        self._url_keys |= fetched
+        self._rebuild_keys()
+        # Only the keys this refresh removed get a grace period; keys
+        # retired by earlier refreshes are dropped.
+        expires_at = time.monotonic() + self.key_grace_period
+        self._retired = {
+            kid: (key, expires_at)
+            for kid, key in previous.items()
+            if kid not in self._keys
+        }
+        self._loaded_at = time.monotonic()
+        return True
+
+    def _rebuild_keys(self):
+        self._keys = {
+            kid: key
+            for keys in self._url_keys.values()
+            for kid, key in keys.items()
+        }
+
+    def _parse(self, jwks: dict) -> dict[str, PyJWK]:
+        return {
+            key.key_id: key
+            for key in PyJWKSet.from_dict(jwks).keys
+            if key.key_id
+        }
+
+    async def _fetch(
+        self, client: httpx.AsyncClient, url: str
+    ) -> dict[str, PyJWK] | None:
+        """Returns the keys of a JWKS URL by kid, or None if it fails."""
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            return self._parse(response.json())
+        except Exception as e:
+            logger.warning(f'Failed to load JWKS from {url}: {e}')
+            return None
+
+    def _lookup(self, kid: str) -> PyJWK | None:
+        key = self._keys.get(kid)
+        if key is None and (retired := self._retired.get(kid)):
+            key, expires_at = retired
+            if time.monotonic() >= expires_at:
+                del self._retired[kid]
+                return None
+        return key
+
+    def _schedule_refresh_if_stale(self):
+        if time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+        if self._background_refresh and not self._background_refresh.done():
+            return
+        self._background_refresh = asyncio.create_task(self._refresh())
+
+    async def get_signing_key(self, token: str) -> PyJWK:
+        """Returns the cached key for the token's `kid`."""
+        kid = jwt.get_unverified_header(token).get('kid')
+        if not kid:
+            raise ValueError('Token has no kid header')
+
+        key = self._lookup(kid)
+        if key is None:
+            await self._refresh()
+            key = self._lookup(kid)
+            if key is None:
+                raise ValueError(f'Unknown signing key {kid}')
+        else:
+            self._schedule_refresh_if_stale()
+        return key
+
+    async def verify_push_notification(self, request: Request) -> bool:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith(AUTH_HEADER_PREFIX):
+            logger.warning('Invalid authorization header')
+            return False
+
+        token = auth_header[len(AUTH_HEADER_PREFIX) :]
+        signing_key = await self.get_signing_key(token)
+
+        decode_token = jwt.decode(
+            token,
+            signing_key.key,
+            options={'require': ['iat', 'request_body_sha256']},
+            algorithms=[signing_key.algorithm_name or 'RS256'],
+        )
+
+        actual_body_sha256 = self._calculate_request_body_sha256(
+            await request.json()
+        )
+        if actual_body_sha256 != decode_token['request_body_sha256']:
+            raise ValueError('Invalid request body')
+
+        if time.time() - decode_token['iat'] > self.max_token_age:
+            raise ValueError('Token is expired')
+
+        return True
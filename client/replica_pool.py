@@ -0,0 +1,149 @@
+"""Load balancing across replicas of the same agent."""
+
+import logging
+import random
+import time
+
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+LEAST_OUTSTANDING = 'least_outstanding'
+LATENCY_WEIGHTED = 'latency_weighted'
+STRATEGIES = (LEAST_OUTSTANDING, LATENCY_WEIGHTED)
+
+
+class Replica:
+    def __init__(self, url: str, send: Callable[..., AsyncIterator]):
+        self.url = url
+        self.send = send
+        self.outstanding = 0
+        # Moving average of the seconds to the first event of a response.
+        self.latency: float | None = None
+
+
+class ReplicaPool:
+    """Replicas of one agent, that is agents whose cards share a name.
+
+    Every task goes to one replica. The agents keep tasks and conversation
+    memory in process, so a task is always continued on the replica that
+    created it, and the tasks of a conversation stay on the replica chosen
+    for its first task while that replica is available. Other requests go
+    to the replica with the fewest outstanding requests, or with
+    `latency_weighted`, to a random replica weighted by the inverse of its
+    average latency times its outstanding requests.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        strategy: str = LEAST_OUTSTANDING,
+        max_pins: int = 10000,
+        latency_alpha: float = 0.2,
+        seed: int | None = None,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Invalid balancing strategy: {strategy}')
+        self.name = name
+        self.strategy = strategy
+        self.max_pins = max_pins
+        self.latency_alpha = latency_alpha
+        self.replicas: dict[str, Replica] = {}
+        self._conversations: OrderedDict[str, str] = OrderedDict()
+        self._tasks: OrderedDict[str, str] = OrderedDict()
+        self._random = random.Random(seed)
+
+    def add_replica(self, replica: Replica):
+        self.replicas[replica.url] = replica
+        logger.info(
+            '%s has %d replica(s): added %s',
+            self.name,
+            len(self.replicas),
+            replica.url,
+        )
+
+    def choose(
+        self,
+        conversation_id: str | None,
+        task_id: str | None,
+        allow: Callable[[str], bool],
+    ) -> Replica | None:
+        """Returns the replica for a request, or None if none can take it.
+
+        `allow` tells whether a replica is accepting requests.
+        """
+        if task_id is not None and (url := self._tasks.get(task_id)):
+            # Only the replica that created the task knows about it.
+            return self.replicas[url] if allow(url) else None
+        if conversation_id is not None and (
+            url := self._conversations.get(conversation_id)
+        ):
+            if allow(url):
+                self._conversations.move_to_end(conversation_id)
+                return self.replicas[url]
+        candidates = [r for r in self.replicas.values() if allow(r.url)]
+        if not candidates:
+            return None
+        if self.strategy == LATENCY_WEIGHTED:
+            replica = self._choose_by_latency(candidates)
+        else:
+            fewest = min(r.outstanding for r in candidates)
+            replica = self._random.choice(
+                [r for r in candidates if r.outstanding == fewest]
+            )
+        if conversation_id is not None:
+            self._pin(self._conversations, conversation_id, replica.url)
+        return replica
+
+    def _choose_by_latency(self, candidates: list[Replica]) -> Replica:
+        known = [r.latency for r in candidates if r.latency is not None]
+        default = sum(known) / len(known) if known else 1.0
+        weights = [
+            1
+            / (
+                max(r.latency if r.latency is not None else default, 1e-3)
+                * (r.outstanding + 1)
+            )
+            for r in candidates
+        ]
+        return self._random.choices(candidates, weights)[0]
+
+    def _pin(self, pins: OrderedDict[str, str], key: str, url: str):
+        pins[key] = url
+        pins.move_to_end(key)
+        while len(pins) > self.max_pins:
+            pins.popitem(last=False)
+
+    async def track(
+        self, replica: Replica, task_id: str, stream: AsyncIterator
+    ) -> AsyncIterator[Any]:
+        """Relays a replica's response and records its load and latency."""
+        self._pin(self._tasks, task_id, replica.url)
+        replica.outstanding += 1
+        start = time.perf_counter()
+        first = True
+        try:
+            async for item in stream:
+                if first:
+                    first = False
+                    latency = time.perf_counter() - start
+                    if replica.latency is None:
+                        replica.latency = latency
+                    else:
+                        replica.latency += self.latency_alpha * (
+                            latency - replica.latency
+                        )
+                yield item
+        finally:
+            replica.outstanding -= 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'replicas': len(self.replicas),
+            'outstanding': sum(r.outstanding for r in self.replicas.values()),
+            'pinned_conversations': len(self._conversations),
+            'pinned_tasks': len(self._tasks),
+        }
@@ -9,6 +9,10 @@ import os
 
 import click
 
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.metrics import install_metrics
+from a2a_observability.structured_logging import configure_logging, logging_stats
+from a2a_observability.tracing import configure_tracing
 from agent import ImageGenerationAgent
 from common.server import A2AServer
 from common.types import (
@@ -18,19 +22,69 @@ from common.types import (
     MissingAPIKeyError,
 )
 from dotenv import load_dotenv
+from file_endpoint import ImageFileEndpoint
+from generation_cache import generation_cache
+from image_store import MiB, image_store
+from image_variants import variant_cache
 from task_manager import AgentTaskManager
 
 
 load_dotenv("../.env")
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
+configure_tracing('a2a-crewai')
 logger = logging.getLogger(__name__)
 
 
 @click.command()
 @click.option('--host', 'host', default='localhost')
 @click.option('--port', 'port', default=10001)
-def main(host, port):
+@click.option(
+    '--max-concurrency',
+    'max_concurrency',
+    default=4,
+    help='Maximum number of image generations processed in parallel.',
+)
+@click.option(
+    '--image-store-mb',
+    'image_store_mb',
+    default=256,
+    help='Memory budget for generated images across all sessions.',
+)
+@click.option(
+    '--image-session-mb',
+    'image_session_mb',
+    default=64,
+    help='Budget for generated images of a single session.',
+)
+@click.option(
+    '--image-spill-dir',
+    'image_spill_dir',
+    default=None,
+    help='Directory for images evicted from memory. Dropped if not set.',
+)
+@click.option(
+    '--image-spill-mb',
+    'image_spill_mb',
+    default=1024,
+    help='Disk budget for spilled images.',
+)
+@click.option(
+    '--generation-cache/--no-generation-cache',
+    'use_generation_cache',
+    default=False,
+    help='Reuse images generated earlier for identical prompts.',
+)
+def main(
+    host,
+    port,
+    max_concurrency,
+    image_store_mb,
+    image_session_mb,
+    image_spill_dir,
+    image_spill_mb,
+    use_generation_cache,
+):
     """Entry point for the A2A + CrewAI Image generation sample."""
     try:
         if not os.getenv('GOOGLE_API_KEY') and not os.getenv(
@@ -40,7 +94,15 @@ def main(host, port):
                 'GOOGLE_API_KEY or Vertex AI environment variables not set.'
             )
 
-        capabilities = AgentCapabilities(streaming=False)
+        image_store.configure(
+            max_bytes=image_store_mb * MiB,
+            max_session_bytes=image_session_mb * MiB,
+            spill_dir=image_spill_dir,
+            max_spill_bytes=image_spill_mb * MiB,
+        )
+        generation_cache.enabled = use_generation_cache
+
+        capabilities = AgentCapabilities(streaming=True)
         skill = AgentSkill(
             id='image_generator',
             name='Image Generator',
@@ -68,12 +130,33 @@ def main(host, port):
             skills=[skill],
         )
 
+        file_endpoint = ImageFileEndpoint(base_url=f'http://{host}:{port}')
+        task_manager = AgentTaskManager(
+            agent=ImageGenerationAgent(),
+            max_concurrent_generations=max_concurrency,
+            file_endpoint=file_endpoint,
+        )
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(agent=ImageGenerationAgent()),
+            task_manager=task_manager,
             host=host,
             port=port,
         )
+        server.app.add_route(
+            ImageFileEndpoint.ROUTE, file_endpoint.handle, methods=['GET']
+        )
+        install_metrics(
+            server.app,
+            task_manager=task_manager,
+            stats={
+                'worker_pool': task_manager.worker_pool.stats,
+                'image_store': image_store.stats,
+                'generation_cache': generation_cache.stats,
+                'variant_cache': variant_cache.stats,
+                'llm_replay': replay_store.stats,
+                'logging': logging_stats,
+            },
+        )
         logger.info(f'Starting server on {host}:{port}')
         server.start()
     except MissingAPIKeyError as e:
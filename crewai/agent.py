@@ -3,31 +3,64 @@
 Handles the agents and also presents the tools required.
 """
 
-import base64
+import asyncio
 import logging
 import os
 import re
+import threading
+import time
 
-from collections.abc import AsyncIterable
-from io import BytesIO
+from collections.abc import AsyncIterable, Callable
 from typing import Any
-from uuid import uuid4
 
-from PIL import Image
-from common.utils.in_memory_cache import InMemoryCache
-from crewai import LLM, Agent, Crew, Task
+from a2a_observability.genai_replay import wrap_genai_client
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.structured_logging import log_event
+from a2a_observability.tracing import current_span, start_span
+from crewai import Agent, Crew, Task
 from crewai.process import Process
 from crewai.tools import tool
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
+from generation_cache import generation_cache
+from image_store import image_store
+from image_variants import VariantSpec, variant_cache
+from llm_replay import ReplayLLM
+from metrics import MeteredLLM
 from pydantic import BaseModel
+from worker_pool import WorkerPool
 
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+IMAGE_MODEL = 'gemini-2.0-flash-exp'
+
+_genai_client: genai.Client | None = None
+_genai_client_lock = threading.Lock()
+
+
+def get_genai_client() -> genai.Client:
+    """Returns the process-wide Gemini client, creating it on first use.
+
+    The client resolves credentials and owns the HTTP connection pool, so it
+    is shared by every tool call and crew run instead of being rebuilt per
+    image.
+    """
+    global _genai_client
+    if _genai_client is None:
+        with _genai_client_lock:
+            if _genai_client is None:
+                start = time.perf_counter()
+                _genai_client = wrap_genai_client(genai.Client)
+                logger.info(
+                    'Created genai client in %.1f ms',
+                    (time.perf_counter() - start) * 1000,
+                )
+    return _genai_client
+
 
 class Imagedata(BaseModel):
     """Represents image data.
@@ -36,14 +69,19 @@ class Imagedata(BaseModel):
       id: Unique identifier for the image.
       name: Name of the image.
       mime_type: MIME type of the image.
-      bytes: Base64 encoded image data.
+      bytes: Raw image data. It is base64 encoded only when it is sent
+        over A2A.
+      width: Width in pixels, set for resized variants.
+      height: Height in pixels, set for resized variants.
       error: Error message if there was an issue with the image.
     """
 
     id: str | None = None
     name: str | None = None
     mime_type: str | None = None
-    bytes: str | None = None
+    bytes: bytes | None = None
+    width: int | None = None
+    height: int | None = None
     error: str | None = None
 
 
@@ -55,8 +93,11 @@ def generate_image_tool(
     if not prompt:
         raise ValueError('Prompt cannot be empty')
 
-    client = genai.Client()
-    cache = InMemoryCache()
+    start = time.perf_counter()
+    client = get_genai_client()
+    logger.debug(
+        'Image client setup took %.3f ms', (time.perf_counter() - start) * 1000
+    )
 
     text_input = (
         prompt,
@@ -65,30 +106,25 @@ def generate_image_tool(
 
     ref_image = None
     logger.info(f'Session id {session_id}')
-    print(f'Session id {session_id}')
 
-    # TODO (rvelicheti) - Change convoluted memory handling logic to a better
-    # version.
-    # Get the image from the cache and send it back to the model.
+    # Get the image from the store and send it back to the model.
     # Assuming the last version of the generated image is applicable.
-    # Convert to PIL Image so the context sent to the LLM is not overloaded
+    # The stored bytes are sent as-is; decoding them into a PIL image would
+    # only make the SDK encode them again.
     try:
         ref_image_data = None
-        # image_id = session_cache[session_id][-1]
-        session_image_data = cache.get(session_id)
         if artifact_file_id:
-            try:
-                ref_image_data = session_image_data[artifact_file_id]
+            ref_image_data = image_store.get(session_id, artifact_file_id)
+            if ref_image_data:
                 logger.info('Found reference image in prompt input')
-            except Exception:
-                ref_image_data = None
         if not ref_image_data:
-            # Insertion order is maintained from python 3.7
-            latest_image_key = list(session_image_data.keys())[-1]
-            ref_image_data = session_image_data[latest_image_key]
+            ref_image_data = image_store.latest(session_id)
 
-        ref_bytes = base64.b64decode(ref_image_data.bytes)
-        ref_image = Image.open(BytesIO(ref_bytes))
+        if ref_image_data:
+            ref_image = types.Part.from_bytes(
+                data=bytes(image_store.read(ref_image_data)),
+                mime_type=ref_image_data.mime_type,
+            )
     except Exception:
         ref_image = None
 
@@ -97,60 +133,78 @@ def generate_image_tool(
     else:
         contents = text_input
 
+    cache_key = generation_cache.make_key(
+        IMAGE_MODEL, prompt, ref_image_data if ref_image else None
+    )
+    cached_image = generation_cache.lookup(cache_key, session_id)
+    if cached_image:
+        if span := current_span():
+            span.set_attribute('generation_cache_hit', True)
+        return cached_image.id
+
     try:
-        response = client.models.generate_content(
-            model='gemini-2.0-flash-exp',
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_modalities=['Text', 'Image']
-            ),
-        )
+        with start_span(
+            'genai.generate_content',
+            model=IMAGE_MODEL,
+            reference_image=ref_image is not None,
+        ):
+            response = client.models.generate_content(
+                model=IMAGE_MODEL,
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    response_modalities=['Text', 'Image']
+                ),
+            )
     except Exception as e:
         logger.error(f'Error generating image {e}')
-        print(f'Exception {e}')
         return -999999999
 
     for part in response.candidates[0].content.parts:
         if part.inline_data is not None:
             try:
-                data = Imagedata(
-                    bytes=base64.b64encode(part.inline_data.data).decode(
-                        'utf-8'
-                    ),
+                image = image_store.put(
+                    session_id,
+                    part.inline_data.data,
                     mime_type=part.inline_data.mime_type,
                     name='generated_image.png',
-                    id=uuid4().hex,
                 )
-                session_data = cache.get(session_id)
-                if session_data is None:
-                    # Session doesn't exist, create it with the new item
-                    cache.set(session_id, {data.id: data})
-                else:
-                    # Session exists, update the existing dictionary directly
-                    session_data[data.id] = data
-
-                return data.id
+                generation_cache.record(cache_key, image)
+                return image.id
             except Exception as e:
                 logger.error(f'Error unpacking image {e}')
-                print(f'Exception {e}')
     return -999999999
 
 
 class ImageGenerationAgent:
     """Agent that generates images based on user prompts."""
 
-    SUPPORTED_CONTENT_TYPES = ['text', 'text/plain', 'image/png']
+    SUPPORTED_CONTENT_TYPES = [
+        'text',
+        'text/plain',
+        'image/png',
+        'image/jpeg',
+        'image/webp',
+    ]
 
     def __init__(self):
+        llm_class = ReplayLLM if replay_store.enabled else MeteredLLM
         if os.getenv('GOOGLE_GENAI_USE_VERTEXAI'):
-            self.model = LLM(model='vertex_ai/gemini-2.0-flash')
+            self.model = llm_class(model='vertex_ai/gemini-2.0-flash')
         elif os.getenv('GOOGLE_API_KEY'):
-            self.model = LLM(
+            self.model = llm_class(
                 model='gemini/gemini-2.0-flash',
                 api_key=os.getenv('GOOGLE_API_KEY'),
             )
 
-        self.image_creator_agent = Agent(
+    def _build_crew(
+        self, step_callback: Callable[[Any], None] | None = None
+    ) -> Crew:
+        """Builds a fresh crew for a single kickoff.
+
+        Crews keep per-run state on their agents and tasks, so concurrent
+        kickoffs each get their own instance instead of sharing one.
+        """
+        image_creator_agent = Agent(
             role='Image Creation Expert',
             goal=(
                 "Generate an image based on the user's text prompt.If the prompt is"
@@ -171,7 +225,7 @@ class ImageGenerationAgent:
             llm=self.model,
         )
 
-        self.image_creation_task = Task(
+        image_creation_task = Task(
             description=(
                 "Receive a user prompt: '{user_prompt}'.\nAnalyze the prompt and"
                 ' identify if you need to create a new image or edit an existing'
@@ -185,14 +239,15 @@ class ImageGenerationAgent:
                 ' sent to you as {artifact_file_id}'
             ),
             expected_output='The id of the generated image',
-            agent=self.image_creator_agent,
+            agent=image_creator_agent,
         )
 
-        self.image_crew = Crew(
-            agents=[self.image_creator_agent],
-            tasks=[self.image_creation_task],
+        return Crew(
+            agents=[image_creator_agent],
+            tasks=[image_creation_task],
             process=Process.sequential,
             verbose=False,
+            step_callback=step_callback,
         )
 
     def extract_artifact_file_id(self, query):
@@ -206,7 +261,12 @@ class ImageGenerationAgent:
         except Exception:
             return None
 
-    def invoke(self, query, session_id) -> str:
+    def invoke(
+        self,
+        query,
+        session_id,
+        step_callback: Callable[[Any], None] | None = None,
+    ) -> str:
         """Kickoff CrewAI and return the response."""
         artifact_file_id = self.extract_artifact_file_id(query)
 
@@ -215,22 +275,96 @@ class ImageGenerationAgent:
             'session_id': session_id,
             'artifact_file_id': artifact_file_id,
         }
-        logger.info(f'Inputs {inputs}')
-        print(f'Inputs {inputs}')
-        response = self.image_crew.kickoff(inputs)
+        log_event(logger, logging.INFO, 'crew_inputs', **inputs)
+        with start_span('crew.kickoff', session_id=session_id):
+            response = self._build_crew(step_callback).kickoff(inputs)
         return response
 
-    async def stream(self, query: str) -> AsyncIterable[dict[str, Any]]:
-        """Streaming is not supported by CrewAI."""
-        raise NotImplementedError('Streaming is not supported by CrewAI.')
+    async def stream(
+        self, query: str, session_id: str, worker_pool: WorkerPool
+    ) -> AsyncIterable[dict[str, Any]]:
+        """Kickoff CrewAI on the worker pool and yield its progress.
+
+        CrewAI does not stream tokens, so progress comes from the crew's step
+        callback, which runs in the worker thread and is handed back to the
+        event loop through a queue. The final item carries the image id.
+        """
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue[str] = asyncio.Queue()
+
+        def step_callback(step: Any):
+            loop.call_soon_threadsafe(
+                updates.put_nowait, self.get_step_message(step)
+            )
+
+        yield {
+            'is_task_complete': False,
+            'content': 'Analyzing the image request...',
+        }
 
-    def get_image_data(self, session_id: str, image_key: str) -> Imagedata:
-        """Return Imagedata given a key. This is a helper method from the agent."""
-        cache = InMemoryCache()
-        session_data = cache.get(session_id)
+        kickoff = asyncio.ensure_future(
+            worker_pool.run(self.invoke, query, session_id, step_callback)
+        )
+        next_update = None
+        try:
+            while not kickoff.done():
+                next_update = asyncio.ensure_future(updates.get())
+                done, _ = await asyncio.wait(
+                    {kickoff, next_update},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if next_update in done:
+                    yield {
+                        'is_task_complete': False,
+                        'content': next_update.result(),
+                    }
+            result = kickoff.result()
+        finally:
+            if next_update is not None:
+                next_update.cancel()
+            # The worker thread cannot be interrupted, but the caller no
+            # longer waits for it once the stream is closed.
+            kickoff.cancel()
+
+        yield {'is_task_complete': True, 'content': result.raw}
+
+    def get_step_message(self, step: Any) -> str:
+        """Describes a crew step as a short progress message."""
+        if getattr(step, 'tool', None) == 'ImageGenerationTool':
+            return 'Generating the image...'
+        if hasattr(step, 'output') and not hasattr(step, 'tool'):
+            return 'Finalizing the image...'
+        return 'Working on the image request...'
+
+    def get_image_data(
+        self,
+        session_id: str,
+        image_key: str,
+        variant: VariantSpec | None = None,
+    ) -> Imagedata:
+        """Return Imagedata given a key. This is a helper method from the agent.
+
+        If a variant is given, the image is resized and re-encoded
+        accordingly; rendered variants are cached.
+        """
+        image = image_store.get(session_id, image_key)
         try:
-            cache.get(session_id)
-            return session_data[image_key]
+            if image is None:
+                raise KeyError(image_key)
+            rendered = variant_cache.get(
+                image.digest,
+                image_store.read(image),
+                image.mime_type,
+                variant or VariantSpec(),
+            )
+            return Imagedata(
+                id=image.id,
+                name=image.name,
+                mime_type=rendered.mime_type,
+                bytes=rendered.data,
+                width=rendered.width,
+                height=rendered.height,
+            )
         except KeyError:
             logger.error('Error generating image')
             return Imagedata(error='Error generating image, please try again.')
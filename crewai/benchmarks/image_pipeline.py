@@ -0,0 +1,85 @@
+"""Benchmark the image edit chain with and without the base64 round-trip.
+
+Each step of an edit chain stores the generated image, reads it back as the
+reference image for the next request and sends it over A2A. The previous
+pipeline stored base64 text, decoded it and re-opened it with PIL (which the
+genai SDK then re-encodes); the current one keeps raw bytes and encodes
+base64 once at the A2A boundary. No model is called.
+
+Run from the crewai directory:
+
+    uv run python -m benchmarks.image_pipeline --size 2048 --steps 5
+"""
+
+import base64
+import io
+import os
+import time
+import tracemalloc
+
+import click
+
+from PIL import Image
+
+from image_store import ImageStore
+
+
+def _make_png(size: int) -> bytes:
+    # Random pixels do not compress, so the PNG is roughly size*size*3 bytes.
+    image = Image.frombytes('RGB', (size, size), os.urandom(size * size * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+def _base64_pipeline(png: bytes, steps: int):
+    cache = {}
+    for step in range(steps):
+        cache[step] = base64.b64encode(png).decode('utf-8')
+        ref_image = Image.open(io.BytesIO(base64.b64decode(cache[step])))
+        # The genai SDK serializes PIL images by saving them again.
+        request_buffer = io.BytesIO()
+        ref_image.save(request_buffer, format=ref_image.format)
+        request_bytes = request_buffer.getvalue()
+        wire = cache[step]
+    return request_bytes, wire
+
+
+def _raw_pipeline(png: bytes, steps: int):
+    store = ImageStore()
+    for _ in range(steps):
+        image = store.put('session', png, 'image/png')
+        request_bytes = bytes(store.read(image))
+        wire = base64.b64encode(store.read(image)).decode('ascii')
+    return request_bytes, wire
+
+
+def _measure(pipeline, png: bytes, steps: int) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.process_time()
+    pipeline(png, steps)
+    elapsed = time.process_time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+@click.command()
+@click.option('--size', default=2048, help='Edge length of the test image.')
+@click.option('--steps', default=5, help='Number of edits in the chain.')
+def main(size: int, steps: int):
+    png = _make_png(size)
+    print(f'image: {len(png) / 1024 / 1024:.1f} MiB PNG, {steps} edit steps')
+    for name, pipeline in (
+        ('base64 + PIL round-trip', _base64_pipeline),
+        ('raw bytes', _raw_pipeline),
+    ):
+        elapsed, peak = _measure(pipeline, png, steps)
+        print(
+            f'{name:<24} cpu {elapsed * 1000:8.1f} ms   '
+            f'peak {peak / 1024 / 1024:7.1f} MiB'
+        )
+
+
+if __name__ == '__main__':
+    main()
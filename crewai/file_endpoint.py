@@ -0,0 +1,168 @@
+"""HTTP endpoint serving stored images by id.
+
+Clients that set `{"imageOutput": {"transfer": "uri"}}` in the task metadata
+receive `FileContent.uri` links to this endpoint instead of inline base64
+bytes. Responses are immutable for a given id and variant, so they carry a
+strong ETag and long-lived cache headers, and support range requests.
+"""
+
+import hashlib
+import logging
+import re
+
+from urllib.parse import urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from image_store import ImageStore, StoredImage, image_store
+from image_variants import (
+    DEFAULT_QUALITY,
+    PIL_FORMATS,
+    SIZE_PRESETS,
+    VariantSpec,
+    variant_cache,
+)
+
+
+logger = logging.getLogger(__name__)
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class ImageFileEndpoint:
+    """Serves `GET /files/{file_id}` from the image store."""
+
+    ROUTE = '/files/{file_id}'
+
+    def __init__(self, base_url: str, store: ImageStore = image_store):
+        self.base_url = base_url.rstrip('/')
+        self.store = store
+
+    def get_file_uri(
+        self, session_id: str, image_key: str, variant: VariantSpec
+    ) -> tuple[str, str] | None:
+        """Returns the URI and MIME type of an image variant, if it exists."""
+        image = self.store.get(session_id, image_key)
+        if image is None:
+            return None
+        query = {}
+        if variant.max_edge is not None:
+            query['size'] = variant.max_edge
+        if variant.mime_type is not None:
+            query['format'] = variant.mime_type
+            query['quality'] = variant.quality
+        uri = f'{self.base_url}/files/{image.id}'
+        if query:
+            uri = f'{uri}?{urlencode(query)}'
+        return uri, variant.mime_type or image.mime_type
+
+    async def handle(self, request: Request) -> Response:
+        image = self.store.get_by_id(request.path_params['file_id'])
+        if image is None:
+            return Response(status_code=404)
+        try:
+            variant = self._parse_variant(request)
+        except ValueError as e:
+            return Response(content=str(e), status_code=400)
+
+        etag = self._etag(image, variant)
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'public, max-age=31536000, immutable',
+            'Accept-Ranges': 'bytes',
+        }
+        if_none_match = _parse_etags(request.headers.get('if-none-match'))
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status_code=304, headers=headers)
+
+        try:
+            rendered = await run_in_threadpool(
+                variant_cache.get,
+                image.digest,
+                self.store.read(image),
+                image.mime_type,
+                variant,
+            )
+        except KeyError:
+            return Response(status_code=404)
+        data = rendered.data
+        media_type = rendered.mime_type
+
+        range_header = request.headers.get('range')
+        if_range = request.headers.get('if-range')
+        if range_header and (if_range is None or if_range == etag):
+            byte_range = _parse_range(range_header, len(data))
+            if byte_range is None:
+                headers['Content-Range'] = f'bytes */{len(data)}'
+                return Response(status_code=416, headers=headers)
+            start, end = byte_range
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+            return Response(
+                content=data[start : end + 1],
+                status_code=206,
+                headers=headers,
+                media_type=media_type,
+            )
+
+        if request.method == 'HEAD':
+            headers['Content-Length'] = str(len(data))
+            return Response(headers=headers, media_type=media_type)
+        return Response(content=data, headers=headers, media_type=media_type)
+
+    def _parse_variant(self, request: Request) -> VariantSpec:
+        params = request.query_params
+        size = params.get('size', 'full')
+        if size.isdigit():
+            max_edge = int(size)
+        elif size in SIZE_PRESETS:
+            max_edge = SIZE_PRESETS[size]
+        else:
+            raise ValueError(f'Unsupported size: {size}')
+        if max_edge is not None and max_edge < 1:
+            raise ValueError(f'Unsupported size: {size}')
+        mime_type = params.get('format')
+        if mime_type is not None and mime_type not in PIL_FORMATS:
+            raise ValueError(f'Unsupported format: {mime_type}')
+        quality = int(params.get('quality', DEFAULT_QUALITY))
+        return VariantSpec(
+            size=size,
+            max_edge=max_edge,
+            mime_type=mime_type,
+            quality=max(1, min(quality, 100)),
+        )
+
+    @staticmethod
+    def _etag(image: StoredImage, variant: VariantSpec) -> str:
+        if variant.is_original:
+            return f'"{image.digest}"'
+        spec = f'{variant.max_edge}:{variant.mime_type}:{variant.quality}'
+        suffix = hashlib.sha256(spec.encode()).hexdigest()[:16]
+        return f'"{image.digest}-{suffix}"'
+
+
+def _parse_etags(header: str | None) -> set[str]:
+    if not header:
+        return set()
+    return {tag.strip().removeprefix('W/') for tag in header.split(',')}
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parses a single `bytes=` range; multi-range requests are rejected."""
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        length = min(int(end), size)
+        if length == 0:
+            return None
+        return size - length, size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
@@ -0,0 +1,94 @@
+"""Content-addressed cache of image generation results."""
+
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+
+from image_store import ImageStore, StoredImage, image_store
+
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    """Maps a generation request to the image it produced.
+
+    A request is identified by the model, the prompt with its whitespace
+    collapsed and the digest of the reference image, if any. Results are
+    kept in the image store, so a hit only links the existing contents into
+    the caller's session. The cache is disabled unless `enabled` is set.
+    """
+
+    def __init__(
+        self, store: ImageStore, max_entries: int = 1024, enabled: bool = False
+    ):
+        self.store = store
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # Request key -> (image digest, mime type), in LRU order.
+        self._entries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        model: str, prompt: str, reference: StoredImage | None = None
+    ) -> str:
+        # Case is kept: it matters for text rendered in the image.
+        normalized_prompt = ' '.join(prompt.split())
+        reference_digest = reference.digest if reference else ''
+        return hashlib.sha256(
+            '\0'.join((model, normalized_prompt, reference_digest)).encode()
+        ).hexdigest()
+
+    def lookup(self, key: str, session_id: str) -> StoredImage | None:
+        """Returns the cached result linked into the session, if any."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        image = None
+        if entry is not None:
+            digest, mime_type = entry
+            image = self.store.link(session_id, digest, mime_type)
+            if image is None:
+                # The contents were evicted from the store.
+                with self._lock:
+                    self._entries.pop(key, None)
+        with self._lock:
+            if image is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        logger.debug(
+            'Generation cache %s: %s',
+            'hit' if image else 'miss',
+            self.stats(),
+        )
+        return image
+
+    def record(self, key: str, image: StoredImage):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (image.digest, image.mime_type)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+generation_cache = GenerationCache(image_store)
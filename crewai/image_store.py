@@ -0,0 +1,296 @@
+"""Byte-budgeted store for generated images.
+
+Images are kept as raw bytes, grouped by session. Image contents are stored
+once per SHA-256 digest, so identical images in several sessions share the
+same bytes. Memory use is bounded by a global budget and a per-session
+budget; when the global budget is exceeded the least recently used images
+are spilled to disk (if a spill directory is configured) or dropped.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+
+logger = logging.getLogger(__name__)
+
+MiB = 1024 * 1024
+
+
+@dataclass
+class StoredImage:
+    """Metadata of a stored image; the bytes are read with `ImageStore.read`."""
+
+    id: str
+    session_id: str
+    name: str
+    mime_type: str
+    size: int
+    created_at: float
+    digest: str
+
+
+@dataclass
+class _Blob:
+    digest: str
+    size: int
+    data: bytes | None = None
+    spill_path: str | None = None
+    image_ids: set[str] = field(default_factory=set)
+
+
+class ImageStore:
+    """Thread-safe LRU image store with memory and disk byte budgets."""
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * MiB,
+        max_session_bytes: int = 64 * MiB,
+        spill_dir: str | None = None,
+        max_spill_bytes: int = 1024 * MiB,
+    ):
+        self._lock = threading.RLock()
+        self._images: dict[str, StoredImage] = {}
+        # Image contents by digest in least-recently-used order.
+        self._blobs: OrderedDict[str, _Blob] = OrderedDict()
+        # Per-session image ids in insertion order; the last one is the
+        # latest image of the session.
+        self._sessions: dict[str, dict[str, None]] = {}
+        self._session_bytes: dict[str, int] = {}
+        self.memory_bytes = 0
+        self.spill_bytes = 0
+        self.evictions = 0
+        self.spills = 0
+        self.deduplicated = 0
+        self.configure(max_bytes, max_session_bytes, spill_dir, max_spill_bytes)
+
+    def configure(
+        self,
+        max_bytes: int = 256 * MiB,
+        max_session_bytes: int = 64 * MiB,
+        spill_dir: str | None = None,
+        max_spill_bytes: int = 1024 * MiB,
+    ):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.max_session_bytes = max_session_bytes
+            self.max_spill_bytes = max_spill_bytes
+            self.spill_dir = spill_dir
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            self._enforce_budgets()
+
+    def put(
+        self,
+        session_id: str,
+        data: bytes,
+        mime_type: str,
+        name: str = 'generated_image.png',
+    ) -> StoredImage:
+        """Stores an image and makes it the latest image of the session.
+
+        Raises ValueError if the image does not fit in the budgets, so it
+        would be dropped right away.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is None:
+                blob = _Blob(digest=digest, size=len(data), data=bytes(data))
+                self._blobs[digest] = blob
+                self.memory_bytes += blob.size
+            else:
+                self._blobs.move_to_end(digest)
+                self.deduplicated += 1
+            image = self._add_image(session_id, blob, mime_type, name)
+            if image.id not in self._images:
+                raise ValueError(
+                    f'Image of {len(data)} bytes does not fit in the store'
+                )
+            return image
+
+    def link(
+        self,
+        session_id: str,
+        digest: str,
+        mime_type: str,
+        name: str = 'generated_image.png',
+    ) -> StoredImage | None:
+        """Adds already stored contents to a session without copying them.
+
+        Returns None if no image with the digest is stored anymore.
+        """
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is None:
+                return None
+            self._blobs.move_to_end(digest)
+            return self._add_image(session_id, blob, mime_type, name)
+
+    def get(self, session_id: str, image_id: str) -> StoredImage | None:
+        """Returns an image of the session and marks it as recently used."""
+        with self._lock:
+            image = self._images.get(image_id)
+            if image is None or image.session_id != session_id:
+                return None
+            self._blobs.move_to_end(image.digest)
+            return image
+
+    def get_by_id(self, image_id: str) -> StoredImage | None:
+        """Returns an image of any session and marks it as recently used."""
+        with self._lock:
+            image = self._images.get(image_id)
+            if image is not None:
+                self._blobs.move_to_end(image.digest)
+            return image
+
+    def latest(self, session_id: str) -> StoredImage | None:
+        """Returns the most recently stored image of the session."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return None
+            return self.get(session_id, next(reversed(session)))
+
+    def read(self, image: StoredImage) -> bytes | memoryview:
+        """Returns the image bytes, memory-mapping them if spilled to disk."""
+        with self._lock:
+            blob = self._blobs.get(image.digest)
+            if blob is None or image.id not in blob.image_ids:
+                raise KeyError(f'Image {image.id} was evicted')
+            if blob.data is not None:
+                return blob.data
+            if blob.size == 0:
+                # Empty files cannot be memory-mapped.
+                return b''
+            with open(blob.spill_path, 'rb') as f:
+                # The mapping stays valid after the file is closed and is
+                # released once the returned view is garbage collected.
+                return memoryview(
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                )
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            for image_id in list(self._sessions.get(session_id, {})):
+                self._remove_image(self._images[image_id])
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'images': len(self._images),
+                'blobs': len(self._blobs),
+                'sessions': len(self._sessions),
+                'memory_bytes': self.memory_bytes,
+                'spill_bytes': self.spill_bytes,
+                'evictions': self.evictions,
+                'spills': self.spills,
+                'deduplicated': self.deduplicated,
+            }
+
+    def _add_image(
+        self, session_id: str, blob: _Blob, mime_type: str, name: str
+    ) -> StoredImage:
+        image = StoredImage(
+            id=uuid4().hex,
+            session_id=session_id,
+            name=name,
+            mime_type=mime_type,
+            size=blob.size,
+            created_at=time.time(),
+            digest=blob.digest,
+        )
+        blob.image_ids.add(image.id)
+        self._images[image.id] = image
+        self._sessions.setdefault(session_id, {})[image.id] = None
+        self._session_bytes[session_id] = (
+            self._session_bytes.get(session_id, 0) + image.size
+        )
+        self._enforce_session_budget(session_id, keep=image.id)
+        self._enforce_budgets()
+        return image
+
+    def _enforce_session_budget(self, session_id: str, keep: str):
+        session = self._sessions[session_id]
+        while self._session_bytes[session_id] > self.max_session_bytes:
+            oldest = next(iter(session))
+            if oldest == keep:
+                break
+            self._remove_image(self._images[oldest])
+
+    def _enforce_budgets(self):
+        for blob in list(self._blobs.values()):
+            if self.memory_bytes <= self.max_bytes:
+                break
+            if blob.data is None:
+                continue
+            if self.spill_dir:
+                self._spill(blob)
+            else:
+                self._evict(blob)
+
+        for blob in list(self._blobs.values()):
+            if self.spill_bytes <= self.max_spill_bytes:
+                break
+            if blob.spill_path is not None:
+                self._evict(blob)
+
+    def _spill(self, blob: _Blob):
+        path = os.path.join(self.spill_dir, f'{blob.digest}.bin')
+        try:
+            with open(path, 'wb') as f:
+                f.write(blob.data)
+        except OSError as e:
+            logger.warning('Failed to spill image %s: %s', blob.digest, e)
+            self._evict(blob)
+            return
+        blob.spill_path = path
+        blob.data = None
+        self.memory_bytes -= blob.size
+        self.spill_bytes += blob.size
+        self.spills += 1
+
+    def _evict(self, blob: _Blob):
+        """Drops the contents and every image that refers to them."""
+        for image_id in list(blob.image_ids):
+            self._remove_image(self._images[image_id])
+        self.evictions += 1
+        logger.info('Evicted image contents %s', blob.digest)
+
+    def _remove_image(self, image: StoredImage):
+        self._images.pop(image.id, None)
+        session = self._sessions.get(image.session_id)
+        if session is not None:
+            session.pop(image.id, None)
+            self._session_bytes[image.session_id] -= image.size
+            if not session:
+                del self._sessions[image.session_id]
+                del self._session_bytes[image.session_id]
+
+        blob = self._blobs.get(image.digest)
+        if blob is None:
+            return
+        blob.image_ids.discard(image.id)
+        if blob.image_ids:
+            return
+        del self._blobs[blob.digest]
+        if blob.data is not None:
+            self.memory_bytes -= blob.size
+            blob.data = None
+        if blob.spill_path is not None:
+            self.spill_bytes -= blob.size
+            try:
+                os.remove(blob.spill_path)
+            except OSError:
+                pass
+            blob.spill_path = None
+
+
+image_store = ImageStore()
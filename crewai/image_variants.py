@@ -0,0 +1,218 @@
+"""Resized and re-encoded variants of stored images.
+
+Clients can ask for smaller or differently encoded images through the
+task's `acceptedOutputModes` (e.g. `image/webp`) or through the task
+metadata:
+
+    {"imageOutput": {"sizes": ["thumbnail", "full"],
+                     "format": "image/webp", "quality": 80,
+                     "transfer": "uri"}}
+
+Variants are rendered on first use and kept in a byte-budgeted LRU cache.
+"""
+
+import logging
+import threading
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any
+
+from PIL import Image
+
+from image_store import MiB
+
+
+logger = logging.getLogger(__name__)
+
+SIZE_PRESETS: dict[str, int | None] = {
+    'thumbnail': 256,
+    'preview': 768,
+    'full': None,
+}
+PIL_FORMATS = {
+    'image/png': 'PNG',
+    'image/jpeg': 'JPEG',
+    'image/webp': 'WEBP',
+}
+DEFAULT_QUALITY = 85
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """A requested rendition of an image.
+
+    Attributes:
+      size: Size preset name, or the longest edge in pixels as a string.
+      max_edge: Longest edge in pixels, or None for the original size.
+      mime_type: Target MIME type, or None to keep the original encoding.
+      quality: Encoder quality for lossy formats.
+    """
+
+    size: str = 'full'
+    max_edge: int | None = None
+    mime_type: str | None = None
+    quality: int = DEFAULT_QUALITY
+
+    @property
+    def is_original(self) -> bool:
+        return self.max_edge is None and self.mime_type is None
+
+
+@dataclass
+class ImageVariant:
+    data: bytes
+    mime_type: str
+    width: int | None = None
+    height: int | None = None
+
+
+def parse_variant_specs(
+    accepted_output_modes: list[str] | None, metadata: dict[str, Any] | None
+) -> list[VariantSpec]:
+    """Returns the variants requested by a task, defaulting to the original."""
+    options = (metadata or {}).get('imageOutput') or {}
+
+    mime_type = options.get('format')
+    if mime_type is None and accepted_output_modes:
+        # Prefer the first compressed format the client accepts; PNG is
+        # what the model produces, so it needs no conversion.
+        mime_type = next(
+            (
+                mode
+                for mode in accepted_output_modes
+                if mode in ('image/webp', 'image/jpeg')
+            ),
+            None,
+        )
+    if mime_type is not None and mime_type not in PIL_FORMATS:
+        logger.warning('Unsupported image format requested: %s', mime_type)
+        mime_type = None
+
+    try:
+        quality = int(options.get('quality', DEFAULT_QUALITY))
+    except (TypeError, ValueError):
+        logger.warning(
+            'Invalid image quality requested: %s', options.get('quality')
+        )
+        quality = DEFAULT_QUALITY
+    quality = max(1, min(quality, 100))
+
+    specs = []
+    for size in options.get('sizes') or ['full']:
+        if isinstance(size, int) or str(size).isdigit():
+            max_edge = int(size)
+        elif isinstance(size, str) and size in SIZE_PRESETS:
+            max_edge = SIZE_PRESETS[size]
+        else:
+            max_edge = 0
+        if max_edge is not None and max_edge < 1:
+            logger.warning('Unsupported image size requested: %s', size)
+            continue
+        specs.append(
+            VariantSpec(
+                size=str(size),
+                max_edge=max_edge,
+                mime_type=mime_type,
+                quality=quality,
+            )
+        )
+    return specs or [VariantSpec(mime_type=mime_type, quality=quality)]
+
+
+def wants_file_uri(metadata: dict[str, Any] | None) -> bool:
+    """Whether the client asked for image links instead of inline bytes."""
+    options = (metadata or {}).get('imageOutput') or {}
+    return options.get('transfer') == 'uri'
+
+
+def render_variant(
+    data: bytes | memoryview, mime_type: str, spec: VariantSpec
+) -> ImageVariant:
+    """Resizes and re-encodes an image according to the spec."""
+    if spec.is_original:
+        return ImageVariant(data=bytes(data), mime_type=mime_type)
+
+    image = Image.open(BytesIO(data))
+    if spec.max_edge is not None:
+        image.thumbnail(
+            (spec.max_edge, spec.max_edge), Image.Resampling.LANCZOS
+        )
+
+    target_mime_type = spec.mime_type or mime_type
+    pil_format = PIL_FORMATS.get(target_mime_type, 'PNG')
+    save_options: dict[str, Any] = {}
+    if pil_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        save_options = {'quality': spec.quality, 'optimize': True}
+    elif pil_format == 'WEBP':
+        save_options = {'quality': spec.quality, 'method': 4}
+    else:
+        save_options = {'optimize': True}
+
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, **save_options)
+    return ImageVariant(
+        data=buffer.getvalue(),
+        mime_type=target_mime_type,
+        width=image.width,
+        height=image.height,
+    )
+
+
+class VariantCache:
+    """LRU cache of rendered variants, keyed by image digest and spec."""
+
+    def __init__(self, max_bytes: int = 64 * MiB):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._variants: OrderedDict[tuple[str, VariantSpec], ImageVariant] = (
+            OrderedDict()
+        )
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        digest: str,
+        data: bytes | memoryview,
+        mime_type: str,
+        spec: VariantSpec,
+    ) -> ImageVariant:
+        if spec.is_original:
+            return render_variant(data, mime_type, spec)
+
+        key = (digest, spec)
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is not None:
+                self._variants.move_to_end(key)
+                self.hits += 1
+                return variant
+            self.misses += 1
+
+        variant = render_variant(data, mime_type, spec)
+        with self._lock:
+            if key not in self._variants:
+                self._variants[key] = variant
+                self.bytes += len(variant.data)
+            while self.bytes > self.max_bytes and self._variants:
+                _, evicted = self._variants.popitem(last=False)
+                self.bytes -= len(evicted.data)
+        return variant
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'variants': len(self._variants),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+variant_cache = VariantCache()
@@ -0,0 +1,26 @@
+"""CrewAI adapter of the LLM replay store.
+
+The store and its configuration are in `a2a_observability.llm_replay`.
+"""
+
+import json
+
+from typing import Any
+
+from a2a_observability.llm_replay import replay_store
+from metrics import MeteredLLM
+
+
+class ReplayLLM(MeteredLLM):
+    """CrewAI LLM whose calls go through the replay store."""
+
+    def call(self, messages: Any, *args: Any, **kwargs: Any) -> Any:
+        store = replay_store
+        request = store.request(self.model, messages, kwargs.get('tools'))
+        response = store.lookup(request)
+        if response is not None:
+            store.delay()
+            return json.loads(response)
+        result = super().call(messages, *args, **kwargs)
+        store.record(request, self.model, json.dumps(result))
+        return result
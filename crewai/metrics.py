@@ -0,0 +1,27 @@
+"""Model call metrics for CrewAI.
+
+The other metrics and `install_metrics` are in `a2a_observability.metrics`.
+"""
+
+import time
+
+from typing import Any
+
+from a2a_observability.metrics import LLM_CALL_DURATION
+from crewai import LLM
+
+
+class MeteredLLM(LLM):
+    """CrewAI LLM that records the latency of its calls."""
+
+    def call(self, messages: Any, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            result = super().call(messages, *args, **kwargs)
+            status = 'ok'
+            return result
+        finally:
+            LLM_CALL_DURATION.labels(self.model, status).observe(
+                time.perf_counter() - start
+            )
@@ -1,9 +1,13 @@
 """Agent Task Manager."""
 
+import base64
 import logging
 
 from collections.abc import AsyncIterable
 
+from a2a_observability.metrics import TASK_REQUESTS
+from a2a_observability.structured_logging import log_event
+from a2a_observability.tracing import start_span, traceparent_from_metadata
 from agent import ImageGenerationAgent
 from common.server import utils
 from common.server.task_manager import InMemoryTaskManager
@@ -11,17 +15,25 @@ from common.types import (
     Artifact,
     FileContent,
     FilePart,
+    InternalError,
     JSONRPCResponse,
+    Message,
     SendTaskRequest,
     SendTaskResponse,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
     Task,
+    TaskArtifactUpdateEvent,
     TaskSendParams,
     TaskState,
     TaskStatus,
+    TaskStatusUpdateEvent,
     TextPart,
 )
+from file_endpoint import ImageFileEndpoint
+from image_variants import parse_variant_specs, wants_file_uri
+from starlette.concurrency import run_in_threadpool
+from worker_pool import WorkerPool
 
 
 logger = logging.getLogger(__name__)
@@ -30,18 +42,121 @@ logger = logging.getLogger(__name__)
 class AgentTaskManager(InMemoryTaskManager):
     """Agent Task Manager, handles task routing and response packing."""
 
-    def __init__(self, agent: ImageGenerationAgent):
+    def __init__(
+        self,
+        agent: ImageGenerationAgent,
+        max_concurrent_generations: int = 4,
+        file_endpoint: ImageFileEndpoint | None = None,
+    ):
         super().__init__()
         self.agent = agent
+        self.file_endpoint = file_endpoint
+        # Crew kickoffs are synchronous and take several seconds, so they run
+        # on a bounded pool instead of blocking the event loop.
+        self.worker_pool = WorkerPool(
+            max_workers=max_concurrent_generations, name='image-agent'
+        )
 
     async def _stream_generator(
-        self, request: SendTaskRequest
-    ) -> AsyncIterable[SendTaskResponse]:
-        raise NotImplementedError('Not implemented')
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        task_send_params: TaskSendParams = request.params
+        with start_span(
+            'agent.stream',
+            traceparent=traceparent_from_metadata(task_send_params.metadata),
+            task_id=task_send_params.id,
+            session_id=task_send_params.sessionId,
+        ):
+            async for response in self._stream_agent(request):
+                yield response
+
+    async def _stream_agent(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        task_send_params: TaskSendParams = request.params
+        query = self._get_user_query(task_send_params)
+        try:
+            async for item in self.agent.stream(
+                query, task_send_params.sessionId, self.worker_pool
+            ):
+                if not item['is_task_complete']:
+                    task_status = TaskStatus(
+                        state=TaskState.WORKING,
+                        message=Message(
+                            role='agent',
+                            parts=[{'type': 'text', 'text': item['content']}],
+                        ),
+                    )
+                    await self._update_store(
+                        task_send_params.id, task_status, None
+                    )
+                    yield SendTaskStreamingResponse(
+                        id=request.id,
+                        result=TaskStatusUpdateEvent(
+                            id=task_send_params.id,
+                            status=task_status,
+                            final=False,
+                        ),
+                    )
+                    continue
+
+                artifact = Artifact(
+                    parts=await self._get_image_parts(
+                        task_send_params, item['content']
+                    ),
+                    index=0,
+                    append=False,
+                )
+                task_status = TaskStatus(state=TaskState.COMPLETED)
+                await self._update_store(
+                    task_send_params.id, task_status, [artifact]
+                )
+                yield SendTaskStreamingResponse(
+                    id=request.id,
+                    result=TaskArtifactUpdateEvent(
+                        id=task_send_params.id, artifact=artifact
+                    ),
+                )
+                yield SendTaskStreamingResponse(
+                    id=request.id,
+                    result=TaskStatusUpdateEvent(
+                        id=task_send_params.id,
+                        status=task_status,
+                        final=True,
+                    ),
+                )
+        except Exception as e:
+            logger.error('An error occurred while streaming the response: %s', e)
+            await self._update_store(
+                task_send_params.id, TaskStatus(state=TaskState.FAILED), None
+            )
+            yield JSONRPCResponse(
+                id=request.id,
+                error=InternalError(
+                    message='An error occurred while streaming the response'
+                ),
+            )
+
+    def _validate_request(
+        self, request: SendTaskRequest | SendTaskStreamingRequest
+    ) -> JSONRPCResponse | None:
+        task_send_params: TaskSendParams = request.params
+        if not utils.are_modalities_compatible(
+            task_send_params.acceptedOutputModes,
+            ImageGenerationAgent.SUPPORTED_CONTENT_TYPES,
+        ):
+            logger.warning(
+                'Unsupported output mode. Received %s, Support %s',
+                task_send_params.acceptedOutputModes,
+                ImageGenerationAgent.SUPPORTED_CONTENT_TYPES,
+            )
+            return utils.new_incompatible_types_error(request.id)
+        return None
 
     async def on_send_task(
         self, request: SendTaskRequest
     ) -> SendTaskResponse | AsyncIterable[SendTaskResponse]:
+        TASK_REQUESTS.labels(request.method).inc()
         ## only support text output at the moment
         if not utils.are_modalities_compatible(
             request.params.acceptedOutputModes,
@@ -62,11 +177,13 @@ class AgentTaskManager(InMemoryTaskManager):
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        TASK_REQUESTS.labels(request.method).inc()
         error = self._validate_request(request)
         if error:
             return error
 
         await self.upsert_task(request.params)
+        return self._stream_generator(request)
 
     async def _update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
@@ -94,26 +211,23 @@ class AgentTaskManager(InMemoryTaskManager):
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
         try:
-            result = self.agent.invoke(query, task_send_params.sessionId)
+            with start_span(
+                'agent.invoke',
+                traceparent=traceparent_from_metadata(task_send_params.metadata),
+                task_id=task_send_params.id,
+                session_id=task_send_params.sessionId,
+            ):
+                result = await self.worker_pool.run(
+                    self.agent.invoke, query, task_send_params.sessionId
+                )
         except Exception as e:
             logger.error('Error invoking agent: %s', e)
             raise ValueError(f'Error invoking agent: {e}') from e
+        logger.info('Image worker pool: %s', self.worker_pool.stats())
 
-        data = self.agent.get_image_data(
-            session_id=task_send_params.sessionId, image_key=result.raw
-        )
-        if not data.error:
-            parts = [
-                FilePart(
-                    file=FileContent(
-                        bytes=data.bytes, mimeType=data.mime_type, name=data.id
-                    )
-                )
-            ]
-        else:
-            parts = [{'type': 'text', 'text': data.error}]
+        parts = await self._get_image_parts(task_send_params, result.raw)
 
-        print(f'Final Result ===> {result}')
+        log_event(logger, logging.DEBUG, 'crew_result', result=result.raw)
         task = await self._update_store(
             task_send_params.id,
             TaskStatus(state=TaskState.COMPLETED),
@@ -121,6 +235,86 @@ class AgentTaskManager(InMemoryTaskManager):
         )
         return SendTaskResponse(id=request.id, result=task)
 
+    async def _get_image_parts(
+        self, task_send_params: TaskSendParams, image_key: str
+    ) -> list:
+        """Builds one file part per image variant the client asked for."""
+        variants = parse_variant_specs(
+            task_send_params.acceptedOutputModes, task_send_params.metadata
+        )
+        if self.file_endpoint and wants_file_uri(task_send_params.metadata):
+            return self._get_image_uri_parts(
+                task_send_params.sessionId, image_key, variants
+            )
+        # Decoding, resizing and encoding images blocks, so the inline
+        # parts are built in a thread like the file endpoint's responses.
+        return await run_in_threadpool(
+            self._get_inline_image_parts,
+            task_send_params.sessionId,
+            image_key,
+            variants,
+        )
+
+    def _get_inline_image_parts(
+        self, session_id: str, image_key: str, variants: list
+    ) -> list:
+        """Builds file parts carrying the image variants as base64 bytes."""
+        parts = []
+        for variant in variants:
+            data = self.agent.get_image_data(
+                session_id=session_id,
+                image_key=image_key,
+                variant=variant,
+            )
+            if data.error:
+                return [{'type': 'text', 'text': data.error}]
+            metadata = {'variant': variant.size}
+            if data.width and data.height:
+                metadata |= {'width': data.width, 'height': data.height}
+            parts.append(
+                FilePart(
+                    file=FileContent(
+                        # Images stay raw bytes inside the agent; base64
+                        # is only needed for the JSON-RPC wire format.
+                        bytes=base64.b64encode(data.bytes).decode('ascii'),
+                        mimeType=data.mime_type,
+                        name=data.id,
+                    ),
+                    metadata=metadata,
+                )
+            )
+        return parts
+
+    def _get_image_uri_parts(
+        self, session_id: str, image_key: str, variants: list
+    ) -> list:
+        """Builds file parts linking to the file endpoint.
+
+        Variants are only rendered when the client fetches them.
+        """
+        parts = []
+        for variant in variants:
+            file_uri = self.file_endpoint.get_file_uri(
+                session_id, image_key, variant
+            )
+            if file_uri is None:
+                return [
+                    {
+                        'type': 'text',
+                        'text': 'Error generating image, please try again.',
+                    }
+                ]
+            uri, mime_type = file_uri
+            parts.append(
+                FilePart(
+                    file=FileContent(
+                        uri=uri, mimeType=mime_type, name=image_key
+                    ),
+                    metadata={'variant': variant.size},
+                )
+            )
+        return parts
+
     def _get_user_query(self, task_send_params: TaskSendParams) -> str:
         part = task_send_params.message.parts[0]
         if not isinstance(part, TextPart):
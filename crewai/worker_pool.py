@@ -0,0 +1,107 @@
+"""Bounded thread pool for running blocking agent calls off the event loop."""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """Runs synchronous callables on a bounded pool of worker threads.
+
+    At most `max_workers` calls run at the same time. Additional calls wait
+    on a semaphore, which makes the number of waiting calls observable as the
+    queue depth. A call whose caller is cancelled keeps its slot until its
+    thread finishes and is counted as abandoned.
+    """
+
+    def __init__(self, max_workers: int = 4, name: str = 'agent-worker'):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self.queue_depth = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `func(*args, **kwargs)` in a worker thread and awaits it."""
+        enqueued_at = time.monotonic()
+        self.queue_depth += 1
+        if self.active >= self.max_workers:
+            logger.info(
+                'Worker pool saturated, %d call(s) waiting', self.queue_depth
+            )
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        wait_seconds = time.monotonic() - enqueued_at
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+        self.active += 1
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context so context variables
+        # (such as the current trace span) are visible in the worker.
+        context = contextvars.copy_context()
+        try:
+            future = loop.run_in_executor(
+                self._executor,
+                functools.partial(context.run, func, *args, **kwargs),
+            )
+        except BaseException:
+            self._finish(None)
+            raise
+        # The slot is released when the thread finishes, not when the
+        # caller stops waiting: a worker thread cannot be interrupted.
+        future.add_done_callback(self._finish)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.abandoned += 1
+            raise
+
+    def _finish(self, future: asyncio.Future | None):
+        self.active -= 1
+        if future is None or future.cancelled() or future.exception():
+            self.failed += 1
+        else:
+            self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> dict[str, Any]:
+        """Returns a snapshot of the pool's load and queue-wait metrics."""
+        return {
+            'max_workers': self.max_workers,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'failed': self.failed,
+            'abandoned': self.abandoned,
+            'avg_wait_seconds': (
+                self.total_wait_seconds / finished
+                if (finished := self.completed + self.failed)
+                else 0.0
+            ),
+            'max_wait_seconds': self.max_wait_seconds,
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -3,6 +3,10 @@ import os
 
 import click
 
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.metrics import install_metrics
+from a2a_observability.structured_logging import configure_logging, logging_stats
+from a2a_observability.tracing import configure_tracing
 from agent import ReimbursementAgent
 from common.server import A2AServer
 from common.types import (
@@ -12,19 +16,35 @@ from common.types import (
     MissingAPIKeyError,
 )
 from dotenv import load_dotenv
+from request_registry import request_registry
+from sqlite_session_service import SqliteSessionService
 from task_manager import AgentTaskManager
 
 
 load_dotenv("../.env")
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
+configure_tracing('a2a-adk')
 logger = logging.getLogger(__name__)
 
 
 @click.command()
 @click.option('--host', default='localhost')
 @click.option('--port', default=10002)
-def main(host, port):
+@click.option('--session-db', default='sessions.db')
+@click.option('--session-ttl-hours', default=24.0)
+@click.option('--max-session-events', default=200)
+@click.option('--requests-db', default='requests.db')
+@click.option('--request-ttl-hours', default=7 * 24.0)
+def main(
+    host,
+    port,
+    session_db,
+    session_ttl_hours,
+    max_session_events,
+    requests_db,
+    request_ttl_hours,
+):
     try:
         # Check for API key only if Vertex AI is not configured
         if not os.getenv('GOOGLE_GENAI_USE_VERTEXAI') == 'TRUE':
@@ -53,12 +73,33 @@ def main(host, port):
             capabilities=capabilities,
             skills=[skill],
         )
+        session_service = SqliteSessionService(
+            db_path=session_db,
+            max_events=max_session_events,
+            session_ttl=session_ttl_hours * 60 * 60,
+        )
+        request_registry.configure(
+            db_path=requests_db, request_ttl=request_ttl_hours * 60 * 60
+        )
+        task_manager = AgentTaskManager(
+            agent=ReimbursementAgent(session_service=session_service)
+        )
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(agent=ReimbursementAgent()),
+            task_manager=task_manager,
             host=host,
             port=port,
         )
+        install_metrics(
+            server.app,
+            task_manager=task_manager,
+            stats={
+                'session_store': session_service.stats,
+                'reimbursement_requests': request_registry.stats,
+                'llm_replay': replay_store.stats,
+                'logging': logging_stats,
+            },
+        )
         server.start()
     except MissingAPIKeyError as e:
         logger.error(f'Error: {e}')
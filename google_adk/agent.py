@@ -1,19 +1,25 @@
 import json
-import random
+import logging
 
 from typing import Any, Optional
 
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.structured_logging import log_event
+from a2a_observability.tracing import start_span
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import BaseSessionService
 from google.adk.tools.tool_context import ToolContext
+from llm_replay import ReplayCallbacks
+from metrics import LLMMetricsCallbacks
+from request_registry import APPROVED, EXPIRED, request_registry
+from sqlite_session_service import SqliteSessionService
 from task_manager import AgentWithTaskManager
 
 
-# Local cache of created request_ids for demo purposes.
-request_ids = set()
+logger = logging.getLogger(__name__)
 
 
 def create_request_form(
@@ -31,17 +37,24 @@ def create_request_form(
     Returns:
         dict[str, Any]: A dictionary containing the request form data.
     """
-    print(f'create_request_form: {date}, {amount}, {purpose}')
-    request_id = 'request_id_' + str(random.randint(1000000, 9999999))
-    request_ids.add(request_id)
-    return {
-        'request_id': request_id,
+    log_event(
+        logger,
+        logging.INFO,
+        'create_request_form',
+        date=date,
+        amount=amount,
+        purpose=purpose,
+    )
+    form_data = {
         'date': '<transaction date>' if not date else date,
         'amount': '<transaction dollar amount>' if not amount else amount,
         'purpose': '<business justification/purpose of the transaction>'
         if not purpose
         else purpose,
     }
+    with start_span('tool.create_request_form'):
+        request_id = request_registry.create(form_data)
+    return {'request_id': request_id, **form_data}
 
 
 def return_form(
@@ -59,7 +72,7 @@ def return_form(
     Returns:
         dict[str, Any]: A JSON dictionary for the form response.
     """
-    print(f'return_form: {form_request}')
+    log_event(logger, logging.INFO, 'return_form', form_request=form_request)
     if isinstance(form_request, str):
         form_request = json.loads(form_request)
 
@@ -103,12 +116,21 @@ def return_form(
 
 def reimburse(request_id: str) -> dict[str, Any]:
     """Reimburse the amount of money to the employee for a given request_id."""
-    print(f'reimburse: {request_id}')
-    if request_id not in request_ids:
+    log_event(logger, logging.INFO, 'reimburse', request_id=request_id)
+    with start_span('tool.reimburse', request_id=request_id):
+        status, approved_now = request_registry.approve(request_id)
+    if status == EXPIRED:
+        return {
+            'request_id': request_id,
+            'status': 'Error: The request has expired.',
+        }
+    if status != APPROVED:
         return {
             'request_id': request_id,
             'status': 'Error: Invalid request_id.',
         }
+    if not approved_now:
+        return {'request_id': request_id, 'status': 'already approved'}
     return {'request_id': request_id, 'status': 'approved'}
 
 
@@ -117,14 +139,14 @@ class ReimbursementAgent(AgentWithTaskManager):
 
     SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
 
-    def __init__(self):
+    def __init__(self, session_service: Optional[BaseSessionService] = None):
         self._agent = self._build_agent()
         self._user_id = 'remote_agent'
         self._runner = Runner(
             app_name=self._agent.name,
             agent=self._agent,
             artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
+            session_service=session_service or SqliteSessionService(),
             memory_service=InMemoryMemoryService(),
         )
 
@@ -133,6 +155,9 @@ class ReimbursementAgent(AgentWithTaskManager):
 
     def _build_agent(self) -> LlmAgent:
         """Builds the LLM agent for the reimbursement agent."""
+        callbacks = LLMMetricsCallbacks(
+            ReplayCallbacks(replay_store) if replay_store.enabled else None
+        )
         return LlmAgent(
             model='gemini-2.5-pro-preview-05-06',
             name='reimbursement_agent',
@@ -167,4 +192,6 @@ class ReimbursementAgent(AgentWithTaskManager):
                 reimburse,
                 return_form,
             ],
+            before_model_callback=callbacks.before_model_callback,
+            after_model_callback=callbacks.after_model_callback,
         )
@@ -0,0 +1,74 @@
+"""ADK adapter of the LLM replay store.
+
+The store and its configuration are in `a2a_observability.llm_replay`.
+"""
+
+import threading
+
+from typing import Any
+
+from a2a_observability.llm_replay import (
+    ReplayRequest,
+    ReplayStore,
+    replay_store,
+)
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from pydantic import BaseModel
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json', exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+
+class ReplayCallbacks:
+    """ADK model callbacks that record and replay LLM responses.
+
+    Pass `before_model_callback` and `after_model_callback` to the agent.
+    A replayed response is returned from the before callback, which makes
+    ADK skip the model call. The before callback is async, so simulated
+    latency does not block other requests.
+    """
+
+    def __init__(self, store: ReplayStore = replay_store):
+        self.store = store
+        self._lock = threading.Lock()
+        # Invocation id -> model and request of the call in progress.
+        self._pending: dict[str, tuple[str, ReplayRequest]] = {}
+
+    async def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        request = self.store.request(
+            llm_request.model,
+            _to_json(llm_request.contents),
+            _to_json(llm_request.config),
+        )
+        response = self.store.lookup(request)
+        if response is not None:
+            await self.store.adelay()
+            return LlmResponse.model_validate_json(response)
+        with self._lock:
+            self._pending[callback_context.invocation_id] = (
+                llm_request.model,
+                request,
+            )
+        return None
+
+    def after_model_callback(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> LlmResponse | None:
+        if llm_response.partial:
+            return None
+        with self._lock:
+            pending = self._pending.pop(callback_context.invocation_id, None)
+        if pending is not None and not llm_response.error_code:
+            model, request = pending
+            self.store.record(
+                request, model, llm_response.model_dump_json(exclude_none=True)
+            )
+        return None
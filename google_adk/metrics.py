@@ -0,0 +1,66 @@
+"""Model call metrics for ADK.
+
+The other metrics and `install_metrics` are in `a2a_observability.metrics`.
+"""
+
+import inspect
+import threading
+import time
+
+from typing import Any
+
+from a2a_observability.metrics import LLM_CALL_DURATION
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+
+class LLMMetricsCallbacks:
+    """ADK model callbacks that record the latency of model calls.
+
+    ADK takes a single before and after model callback, so other callbacks
+    with the same methods (such as `ReplayCallbacks`) are passed in and
+    called from these; the wrapped before callback may be async. Responses
+    returned by it skip the model and are not timed.
+    """
+
+    def __init__(self, callbacks: Any = None):
+        self.callbacks = callbacks
+        self._lock = threading.Lock()
+        # Invocation id -> model and start time of the call in progress.
+        self._started: dict[str, tuple[str, float]] = {}
+
+    async def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        if self.callbacks is not None:
+            response = self.callbacks.before_model_callback(
+                callback_context, llm_request
+            )
+            if inspect.isawaitable(response):
+                response = await response
+            if response is not None:
+                return response
+        with self._lock:
+            self._started[callback_context.invocation_id] = (
+                llm_request.model or 'unknown',
+                time.perf_counter(),
+            )
+        return None
+
+    def after_model_callback(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> LlmResponse | None:
+        if not llm_response.partial:
+            with self._lock:
+                started = self._started.pop(callback_context.invocation_id, None)
+            if started is not None:
+                model, start = started
+                status = 'error' if llm_response.error_code else 'ok'
+                LLM_CALL_DURATION.labels(model, status).observe(
+                    time.perf_counter() - start
+                )
+        if self.callbacks is not None:
+            return self.callbacks.after_model_callback(
+                callback_context, llm_response
+            )
+        return None
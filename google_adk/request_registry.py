@@ -0,0 +1,183 @@
+"""Durable registry of reimbursement requests."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from typing import Any, Optional
+from uuid import uuid4
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+APPROVED = 'approved'
+EXPIRED = 'expired'
+STATUSES = (PENDING, APPROVED, EXPIRED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id TEXT PRIMARY KEY,
+    form_data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_status_created
+    ON requests (status, created_at);
+"""
+
+
+class RequestRegistry:
+    """Stores reimbursement requests in SQLite.
+
+    Pending requests are also indexed in memory, so checking a request id
+    does not touch the database. Requests left pending for longer than
+    `request_ttl` seconds are marked as expired and can no longer be
+    approved.
+    """
+
+    def __init__(
+        self,
+        db_path: str = ':memory:',
+        request_ttl: float = 7 * 24 * 60 * 60,
+        sweep_interval: float = 5 * 60,
+    ):
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Pending request id -> creation time.
+        self._pending: dict[str, float] = {}
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self.configure(db_path, request_ttl)
+
+    def configure(self, db_path: str, request_ttl: float):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self.request_ttl = request_ttl
+            self._conn = sqlite3.connect(
+                db_path, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+            self._pending = dict(
+                self._conn.execute(
+                    'SELECT id, created_at FROM requests WHERE status = ?',
+                    (PENDING,),
+                ).fetchall()
+            )
+        self.expire_stale(force=True)
+
+    def create(self, form_data: dict[str, Any]) -> str:
+        """Registers a new pending request and returns its id."""
+        request_id = 'request_id_' + uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO requests VALUES (?, ?, ?, ?, ?)',
+                (request_id, json.dumps(form_data), PENDING, now, now),
+            )
+            self._pending[request_id] = now
+        self.expire_stale()
+        return request_id
+
+    def get(self, request_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT form_data, status, created_at, updated_at'
+                ' FROM requests WHERE id = ?',
+                (request_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        form_data, status, created_at, updated_at = row
+        return {
+            'request_id': request_id,
+            'form_data': json.loads(form_data),
+            'status': status,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        }
+
+    def status(self, request_id: str) -> Optional[str]:
+        with self._lock:
+            created_at = self._pending.get(request_id)
+            if created_at is not None:
+                if time.time() - created_at <= self.request_ttl:
+                    return PENDING
+                self._expire([request_id])
+                return EXPIRED
+            row = self._conn.execute(
+                'SELECT status FROM requests WHERE id = ?', (request_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def approve(self, request_id: str) -> tuple[Optional[str], bool]:
+        """Approves a pending request.
+
+        Returns the resulting status, or None if the id is unknown, and
+        whether this call approved the request. Approving an approved
+        request is a no-op; expired requests stay expired.
+        """
+        with self._lock:
+            created_at = self._pending.pop(request_id, None)
+            if created_at is not None:
+                if time.time() - created_at > self.request_ttl:
+                    self._expire([request_id])
+                    return EXPIRED, False
+                # The status check makes a concurrent approval or expiry
+                # through another registry on the database lose cleanly.
+                updated = self._conn.execute(
+                    'UPDATE requests SET status = ?, updated_at = ?'
+                    ' WHERE id = ? AND status = ?',
+                    (APPROVED, time.time(), request_id, PENDING),
+                )
+                if updated.rowcount:
+                    return APPROVED, True
+            row = self._conn.execute(
+                'SELECT status FROM requests WHERE id = ?', (request_id,)
+            ).fetchone()
+        return (row[0] if row else None), False
+
+    def expire_stale(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.request_ttl
+        with self._lock:
+            stale = [
+                request_id
+                for request_id, created_at in self._pending.items()
+                if created_at < cutoff
+            ]
+            self._expire(stale)
+        if stale:
+            logger.info(f'Expired {len(stale)} abandoned request(s)')
+
+    def _expire(self, request_ids: list[str]):
+        if not request_ids:
+            return
+        now = time.time()
+        self._conn.executemany(
+            'UPDATE requests SET status = ?, updated_at = ?'
+            ' WHERE id = ? AND status = ?',
+            [(EXPIRED, now, request_id, PENDING) for request_id in request_ids],
+        )
+        for request_id in request_ids:
+            self._pending.pop(request_id, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            counts = dict(
+                self._conn.execute(
+                    'SELECT status, COUNT(*) FROM requests GROUP BY status'
+                ).fetchall()
+            )
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+
+request_registry = RequestRegistry()
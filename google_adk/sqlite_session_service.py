@@ -0,0 +1,445 @@
+"""SQLite-backed ADK session service with bounded history."""
+
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional
+from uuid import uuid4
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListEventsResponse,
+    ListSessionsResponse,
+)
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE INDEX IF NOT EXISTS sessions_last_update
+    ON sessions (last_update_time);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_session
+    ON events (app_name, user_id, session_id, seq);
+"""
+
+_SESSION = 'app_name = ? AND user_id = ? AND session_id = ?'
+_IS_USER_EVENT = "json_extract(event, '$.author') = 'user'"
+
+
+def turn_start(events: list[Event], max_events: int) -> int:
+    """Returns the index of the first event to keep of a session.
+
+    History is cut at the oldest user event among the newest `max_events`
+    events, so a model's function call is never separated from its
+    response. If that window holds no user event, the whole current turn
+    is kept.
+    """
+    if len(events) <= max_events:
+        return 0
+    window = len(events) - max_events
+    starts = [i for i, e in enumerate(events) if e.author == 'user']
+    kept = [i for i in starts if i >= window]
+    if kept:
+        return kept[0]
+    return starts[-1] if starts else 0
+
+
+@dataclass
+class _PendingSession:
+    """Queued writes of a session that are not committed yet."""
+
+    ops: int = 0
+    # Set by a queued create (True) or delete (False).
+    exists: Optional[bool] = None
+    # Set by a queued delete: the stored events are about to be removed.
+    reset: bool = False
+    state: Optional[str] = None
+    last_update_time: Optional[float] = None
+    # Event ids and JSON of the appended events.
+    events: list[tuple[str, str]] = field(default_factory=list)
+
+
+class SqliteSessionService(BaseSessionService):
+    """Persists ADK sessions in SQLite.
+
+    About the most recent `max_events` events of a session are kept (see
+    `turn_start`), and sessions not updated for `session_ttl` seconds are
+    deleted. Events are read from the database when a session is fetched,
+    so only writes in flight are held in memory. State is stored per
+    session; `app:` and `user:` prefixed keys are not shared across
+    sessions.
+
+    Writes are queued to a background thread, which commits everything
+    queued since its last commit in one transaction, so the event loop
+    never waits for the disk. Reads use their own connection, which WAL
+    lets run alongside the writer, and add the queued writes of the
+    session on top of what is stored. `db_path` must therefore name a
+    file rather than `:memory:`.
+    """
+
+    def __init__(
+        self,
+        db_path: str = 'sessions.db',
+        max_events: int = 200,
+        session_ttl: float = 24 * 60 * 60,
+        sweep_interval: float = 5 * 60,
+    ):
+        self.max_events = max_events
+        self.session_ttl = session_ttl
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        # Only the writer thread uses this connection.
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # In WAL mode, NORMAL only syncs at checkpoints; a crash can lose
+        # the last commits but not corrupt the database.
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._reader = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        self._pending_lock = threading.Lock()
+        self._pending: dict[tuple[str, str, str], _PendingSession] = {}
+        self._writes: queue.Queue[tuple] = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write_loop, name='session-writer', daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id or uuid4().hex,
+            state=state or {},
+            last_update_time=time.time(),
+        )
+        key = (app_name, user_id, session.id)
+        state_json = json.dumps(session.state)
+        with self._pending_lock:
+            pending = self._queue(
+                ('create', key, state_json, session.last_update_time)
+            )
+            pending.exists = True
+            pending.state = state_json
+            pending.last_update_time = session.last_update_time
+        return session
+
+    def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        # The queued writes are read before the database: a write that is
+        # committed in between is then found in both and deduplicated.
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending = replace(pending, events=list(pending.events))
+        if pending is not None and pending.exists is False:
+            return None
+
+        with self._lock:
+            row = self._reader.execute(
+                'SELECT state, last_update_time FROM sessions'
+                ' WHERE app_name = ? AND user_id = ? AND id = ?',
+                key,
+            ).fetchone()
+            rows = []
+            if pending is None or not pending.reset:
+                rows = self._reader.execute(
+                    f'SELECT event FROM events WHERE {_SESSION}'
+                    ' ORDER BY seq',
+                    key,
+                ).fetchall()
+
+        if pending is None:
+            if row is None:
+                return None
+            state, last_update_time = row
+            if time.time() - last_update_time > self.session_ttl:
+                self.delete_session(
+                    app_name=app_name, user_id=user_id, session_id=session_id
+                )
+                return None
+        else:
+            if row is None and not pending.exists:
+                return None
+            state, last_update_time = row or (None, None)
+            state = pending.state or state
+            last_update_time = pending.last_update_time or last_update_time
+
+        events = [Event.model_validate_json(r[0]) for r in rows]
+        if pending is not None:
+            stored = {event.id for event in events}
+            events.extend(
+                Event.model_validate_json(event)
+                for event_id, event in pending.events
+                if event_id not in stored
+            )
+        events = events[turn_start(events, self.max_events) :]
+        if config and config.after_timestamp:
+            events = [e for e in events if e.timestamp > config.after_timestamp]
+        if config and config.num_recent_events:
+            events = events[-config.num_recent_events :]
+
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=json.loads(state),
+            events=events,
+            last_update_time=last_update_time,
+        )
+
+    def list_sessions(
+        self, *, app_name: str, user_id: str
+    ) -> ListSessionsResponse:
+        with self._lock:
+            rows = self._reader.execute(
+                'SELECT id, state, last_update_time FROM sessions'
+                ' WHERE app_name = ? AND user_id = ?',
+                (app_name, user_id),
+            ).fetchall()
+        sessions = {
+            session_id: (state, last_update_time)
+            for session_id, state, last_update_time in rows
+        }
+        with self._pending_lock:
+            for (app, user, session_id), pending in self._pending.items():
+                if (app, user) != (app_name, user_id):
+                    continue
+                if pending.exists is False:
+                    sessions.pop(session_id, None)
+                elif pending.state is not None:
+                    sessions[session_id] = (
+                        pending.state,
+                        pending.last_update_time,
+                    )
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    state=json.loads(state),
+                    last_update_time=last_update_time,
+                )
+                for session_id, (state, last_update_time) in sessions.items()
+            ]
+        )
+
+    def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        key = (app_name, user_id, session_id)
+        with self._pending_lock:
+            pending = self._queue(('delete', key))
+            pending.exists = False
+            pending.reset = True
+            pending.state = None
+            pending.last_update_time = None
+            pending.events.clear()
+
+    def list_events(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> ListEventsResponse:
+        session = self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        return ListEventsResponse(events=session.events if session else [])
+
+    def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        if start := turn_start(session.events, self.max_events):
+            del session.events[:start]
+
+        key = (session.app_name, session.user_id, session.id)
+        event_json = event.model_dump_json()
+        state_json = json.dumps(session.state)
+        with self._pending_lock:
+            pending = self._queue(
+                ('event', key, event_json, event.timestamp, state_json)
+            )
+            pending.events.append((event.id, event_json))
+            pending.state = state_json
+            pending.last_update_time = event.timestamp
+        return event
+
+    def flush(self):
+        """Waits until all queued writes are committed."""
+        self._writes.join()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            (sessions,) = self._reader.execute(
+                'SELECT COUNT(*) FROM sessions'
+            ).fetchone()
+            (events,) = self._reader.execute(
+                'SELECT COUNT(*) FROM events'
+            ).fetchone()
+        return {
+            'sessions': sessions,
+            'events': events,
+            'queued_writes': self._writes.qsize(),
+        }
+
+    def _queue(self, op: tuple) -> _PendingSession:
+        """Queues a write; the caller holds the pending lock."""
+        pending = self._pending.setdefault(op[1], _PendingSession())
+        pending.ops += 1
+        self._writes.put(op)
+        return pending
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception(f'Failed to write {len(batch)} change(s)')
+            finally:
+                with self._pending_lock:
+                    for _, key, *_ in batch:
+                        pending = self._pending[key]
+                        pending.ops -= 1
+                        if not pending.ops:
+                            del self._pending[key]
+                for _ in batch:
+                    self._writes.task_done()
+            try:
+                self._sweep_expired()
+            except Exception:
+                logger.exception('Failed to delete expired sessions')
+
+    def _write(self, batch: list[tuple]):
+        self._conn.execute('BEGIN')
+        try:
+            appended = {}
+            for kind, key, *args in batch:
+                if kind == 'create':
+                    state, last_update_time = args
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)',
+                        (*key, state, last_update_time),
+                    )
+                elif kind == 'delete':
+                    self._delete(*key)
+                else:
+                    event, timestamp, state = args
+                    updated = self._conn.execute(
+                        'UPDATE sessions SET state = ?, last_update_time = ?'
+                        ' WHERE app_name = ? AND user_id = ? AND id = ?',
+                        (state, timestamp, *key),
+                    )
+                    # The session was deleted while the event was queued.
+                    if not updated.rowcount:
+                        continue
+                    self._conn.execute(
+                        'INSERT INTO events'
+                        ' (app_name, user_id, session_id, timestamp, event)'
+                        ' VALUES (?, ?, ?, ?, ?)',
+                        (*key, timestamp, event),
+                    )
+                    appended[key] = True
+            for key in appended:
+                self._trim(key)
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _trim(self, key: tuple[str, str, str]):
+        """Drops the events before the turn `turn_start` would keep."""
+        self._conn.execute(
+            f'DELETE FROM events WHERE {_SESSION} AND seq < COALESCE('
+            '  (SELECT MIN(seq) FROM'
+            f'    (SELECT seq, event FROM events WHERE {_SESSION}'
+            '     ORDER BY seq DESC LIMIT ?)'
+            f'   WHERE {_IS_USER_EVENT}),'
+            f'  (SELECT MAX(seq) FROM events WHERE {_SESSION}'
+            f'   AND {_IS_USER_EVENT}),'
+            '  0)',
+            (*key, *key, self.max_events, *key),
+        )
+
+    def _delete(self, app_name: str, user_id: str, session_id: str):
+        self._conn.execute(
+            'DELETE FROM events'
+            ' WHERE app_name = ? AND user_id = ? AND session_id = ?',
+            (app_name, user_id, session_id),
+        )
+        self._conn.execute(
+            'DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?',
+            (app_name, user_id, session_id),
+        )
+
+    def _sweep_expired(self):
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.session_ttl
+        expired = self._conn.execute(
+            'SELECT app_name, user_id, id FROM sessions'
+            ' WHERE last_update_time < ?',
+            (cutoff,),
+        ).fetchall()
+        if not expired:
+            return
+        self._conn.execute('BEGIN')
+        try:
+            for app_name, user_id, session_id in expired:
+                self._delete(app_name, user_id, session_id)
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        logger.info(f'Deleted {len(expired)} expired session(s)')
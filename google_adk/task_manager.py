@@ -3,12 +3,17 @@ import logging
 
 from abc import ABC, abstractmethod
 from collections.abc import AsyncIterable
+from contextlib import aclosing
 from typing import Any
 
+from a2a_observability.metrics import TASK_REQUESTS
+from a2a_observability.structured_logging import log_event
+from a2a_observability.tracing import start_span, traceparent_from_metadata
 from common.server import utils
 from common.server.task_manager import InMemoryTaskManager
 from common.types import (
     Artifact,
+    DataPart,
     InternalError,
     JSONRPCResponse,
     Message,
@@ -36,7 +41,7 @@ class AgentWithTaskManager(ABC):
     def get_processing_message(self) -> str:
         pass
 
-    def invoke(self, query, session_id) -> str:
+    async def invoke(self, query, session_id) -> str:
         session = self._runner.session_service.get_session(
             app_name=self._agent.name,
             user_id=self._user_id,
@@ -52,16 +57,27 @@ class AgentWithTaskManager(ABC):
                 state={},
                 session_id=session_id,
             )
-        events = list(
-            self._runner.run(
+        # Only the final response is needed, so events are not buffered and
+        # the run is closed as soon as that response arrives.
+        last_event = None
+        async with aclosing(
+            self._runner.run_async(
                 user_id=self._user_id,
                 session_id=session.id,
                 new_message=content,
             )
-        )
-        if not events or not events[-1].content or not events[-1].content.parts:
+        ) as events:
+            async for event in events:
+                last_event = event
+                if event.is_final_response():
+                    break
+        if (
+            not last_event
+            or not last_event.content
+            or not last_event.content.parts
+        ):
             return ''
-        return '\n'.join([p.text for p in events[-1].content.parts if p.text])
+        return '\n'.join([p.text for p in last_event.content.parts if p.text])
 
     async def stream(self, query, session_id) -> AsyncIterable[dict[str, Any]]:
         session = self._runner.session_service.get_session(
@@ -125,10 +141,23 @@ class AgentTaskManager(InMemoryTaskManager):
 
     async def _stream_generator(
         self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        task_send_params: TaskSendParams = request.params
+        with start_span(
+            'agent.stream',
+            traceparent=traceparent_from_metadata(task_send_params.metadata),
+            task_id=task_send_params.id,
+            session_id=task_send_params.sessionId,
+        ):
+            async for response in self._stream_agent(request):
+                yield response
+
+    async def _stream_agent(
+        self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
-        print(f'query: {query}')
+        log_event(logger, logging.DEBUG, 'user_query', query=query)
         try:
             async for item in self.agent.stream(
                 query, task_send_params.sessionId
@@ -156,42 +185,46 @@ class AgentTaskManager(InMemoryTaskManager):
                         task_state = TaskState.COMPLETED
                         parts = [{'type': 'text', 'text': item['content']}]
                     artifacts = [Artifact(parts=parts, index=0, append=False)]
-            message = Message(role='agent', parts=parts)
-            task_status = TaskStatus(state=task_state, message=message)
-            await self._update_store(
-                task_send_params.id, task_status, artifacts
-            )
-            task_update_event = TaskStatusUpdateEvent(
-                id=task_send_params.id,
-                status=task_status,
-                final=False,
-            )
-            yield SendTaskStreamingResponse(
-                id=request.id, result=task_update_event
-            )
-            # Now yield Artifacts too
-            if artifacts:
-                for artifact in artifacts:
+                message = Message(role='agent', parts=parts)
+                task_status = TaskStatus(state=task_state, message=message)
+                await self._update_store(
+                    task_send_params.id, task_status, artifacts
+                )
+                task_update_event = TaskStatusUpdateEvent(
+                    id=task_send_params.id,
+                    status=task_status,
+                    final=False,
+                )
+                yield SendTaskStreamingResponse(
+                    id=request.id, result=task_update_event
+                )
+                # Now yield Artifacts too
+                if artifacts:
+                    for artifact in artifacts:
+                        yield SendTaskStreamingResponse(
+                            id=request.id,
+                            result=TaskArtifactUpdateEvent(
+                                id=task_send_params.id,
+                                artifact=artifact,
+                            ),
+                        )
+                if is_task_complete:
                     yield SendTaskStreamingResponse(
                         id=request.id,
-                        result=TaskArtifactUpdateEvent(
+                        result=TaskStatusUpdateEvent(
                             id=task_send_params.id,
-                            artifact=artifact,
+                            status=TaskStatus(
+                                state=task_status.state,
+                            ),
+                            final=True,
                         ),
                     )
-            if is_task_complete:
-                yield SendTaskStreamingResponse(
-                    id=request.id,
-                    result=TaskStatusUpdateEvent(
-                        id=task_send_params.id,
-                        status=TaskStatus(
-                            state=task_status.state,
-                        ),
-                        final=True,
-                    ),
-                )
+                    break
         except Exception as e:
             logger.error(f'An error occurred while streaming the response: {e}')
+            await self._update_store(
+                task_send_params.id, TaskStatus(state=TaskState.FAILED), None
+            )
             yield JSONRPCResponse(
                 id=request.id,
                 error=InternalError(
@@ -215,6 +248,7 @@ class AgentTaskManager(InMemoryTaskManager):
             return utils.new_incompatible_types_error(request.id)
 
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        TASK_REQUESTS.labels(request.method).inc()
         error = self._validate_request(request)
         if error:
             return error
@@ -224,6 +258,7 @@ class AgentTaskManager(InMemoryTaskManager):
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        TASK_REQUESTS.labels(request.method).inc()
         error = self._validate_request(request)
         if error:
             return error
@@ -233,26 +268,35 @@ class AgentTaskManager(InMemoryTaskManager):
     async def _update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
-            try:
-                task = self.tasks[task_id]
-            except KeyError:
-                logger.error(f'Task {task_id} not found for updating the task')
-                raise ValueError(f'Task {task_id} not found')
-            task.status = status
-            # if status.message is not None:
-            #    self.task_messages[task_id].append(status.message)
-            if artifacts is not None:
-                if task.artifacts is None:
-                    task.artifacts = []
-                task.artifacts.extend(artifacts)
-            return task
+        # The update does not await, so it runs atomically on the event loop
+        # and needs neither the global store lock nor a per-task lock.
+        try:
+            task = self.tasks[task_id]
+        except KeyError:
+            logger.error(f'Task {task_id} not found for updating the task')
+            raise ValueError(f'Task {task_id} not found')
+        task.status = status
+        # if status.message is not None:
+        #    self.task_messages[task_id].append(status.message)
+        if artifacts is not None:
+            if task.artifacts is None:
+                task.artifacts = []
+            task.artifacts.extend(artifacts)
+        return task
 
     async def _invoke(self, request: SendTaskRequest) -> SendTaskResponse:
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
         try:
-            result = self.agent.invoke(query, task_send_params.sessionId)
+            with start_span(
+                'agent.invoke',
+                traceparent=traceparent_from_metadata(task_send_params.metadata),
+                task_id=task_send_params.id,
+                session_id=task_send_params.sessionId,
+            ):
+                result = await self.agent.invoke(
+                    query, task_send_params.sessionId
+                )
         except Exception as e:
             logger.error(f'Error invoking agent: {e}')
             raise ValueError(f'Error invoking agent: {e}')
@@ -273,6 +317,10 @@ class AgentTaskManager(InMemoryTaskManager):
 
     def _get_user_query(self, task_send_params: TaskSendParams) -> str:
         part = task_send_params.message.parts[0]
+        if isinstance(part, DataPart):
+            # Submitted forms arrive as structured data; the agent reads
+            # them as JSON so it does not have to parse a repr string.
+            return json.dumps(part.data)
         if not isinstance(part, TextPart):
-            raise ValueError('Only text parts are supported')
+            raise ValueError('Only text and data parts are supported')
         return part.text
@@ -3,7 +3,12 @@ import os
 
 import click
 
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.metrics import install_metrics
+from a2a_observability.structured_logging import configure_logging, logging_stats
+from a2a_observability.tracing import configure_tracing
 from agent import CurrencyAgent
+from push_dispatcher import SigningPushNotificationSenderAuth
 from task_manager import AgentTaskManager
 from common.server import A2AServer
 from common.types import (
@@ -12,20 +17,26 @@ from common.types import (
     AgentSkill,
     MissingAPIKeyError,
 )
-from common.utils.push_notification_auth import PushNotificationSenderAuth
 from dotenv import load_dotenv
 
 
 load_dotenv("../.env")
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
+configure_tracing('a2a-langgraph')
 logger = logging.getLogger(__name__)
 
 
 @click.command()
 @click.option('--host', 'host', default='localhost')
 @click.option('--port', 'port', default=10000)
-def main(host, port):
+@click.option(
+    '--max-concurrency',
+    'max_concurrency',
+    default=4,
+    help='Maximum number of non-streaming requests processed in parallel.',
+)
+def main(host, port, max_concurrency):
     """Starts the Currency Agent server."""
     try:
         if not os.getenv('GOOGLE_API_KEY'):
@@ -52,14 +63,16 @@ def main(host, port):
             skills=[skill],
         )
 
-        notification_sender_auth = PushNotificationSenderAuth()
+        notification_sender_auth = SigningPushNotificationSenderAuth()
         notification_sender_auth.generate_jwk()
+        task_manager = AgentTaskManager(
+            agent=CurrencyAgent(),
+            notification_sender_auth=notification_sender_auth,
+            max_concurrent_invocations=max_concurrency,
+        )
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(
-                agent=CurrencyAgent(),
-                notification_sender_auth=notification_sender_auth,
-            ),
+            task_manager=task_manager,
             host=host,
             port=port,
         )
@@ -69,6 +82,19 @@ def main(host, port):
             notification_sender_auth.handle_jwks_endpoint,
             methods=['GET'],
         )
+        server.app.add_event_handler(
+            'shutdown', task_manager.notification_dispatcher.aclose
+        )
+        install_metrics(
+            server.app,
+            task_manager=task_manager,
+            stats={
+                'worker_pool': task_manager.worker_pool.stats,
+                'push_dispatcher': task_manager.notification_dispatcher.stats,
+                'llm_replay': replay_store.stats,
+                'logging': logging_stats,
+            },
+        )
 
         logger.info(f'Starting server on {host}:{port}')
         server.start()
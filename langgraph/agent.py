@@ -1,9 +1,14 @@
 from collections.abc import AsyncIterable
+import logging
 import time
 from typing import Any, Literal
 
 import httpx
 
+from a2a_observability.llm_replay import replay_store
+from a2a_observability.structured_logging import log_event
+from a2a_observability.tracing import start_span
+from langchain_core.globals import set_llm_cache
 from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.tools import tool
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -11,8 +16,12 @@ from pydantic import BaseModel
 
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
+from llm_replay import ReplayLLMCache
+from metrics import LLMMetricsCallbackHandler
 
 
+logger = logging.getLogger(__name__)
+
 memory = MemorySaver()
 
 
@@ -32,21 +41,26 @@ def get_exchange_rate(
     Returns:
         A dictionary containing the exchange rate data, or an error message if the request fails.
     """
-    try:
-        response = httpx.get(
-            f'https://api.frankfurter.app/{currency_date}',
-            params={'from': currency_from, 'to': currency_to},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        if 'rates' not in data:
-            return {'error': 'Invalid API response format.'}
-        return data
-    except httpx.HTTPError as e:
-        return {'error': f'API request failed: {e}'}
-    except ValueError:
-        return {'error': 'Invalid JSON response from API.'}
+    with start_span(
+        'tool.get_exchange_rate',
+        currency_from=currency_from,
+        currency_to=currency_to,
+    ):
+        try:
+            response = httpx.get(
+                f'https://api.frankfurter.app/{currency_date}',
+                params={'from': currency_from, 'to': currency_to},
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            if 'rates' not in data:
+                return {'error': 'Invalid API response format.'}
+            return data
+        except httpx.HTTPError as e:
+            return {'error': f'API request failed: {e}'}
+        except ValueError:
+            return {'error': 'Invalid JSON response from API.'}
 
 
 class ResponseFormat(BaseModel):
@@ -69,7 +83,11 @@ class CurrencyAgent:
     )
 
     def __init__(self):
-        self.model = ChatGoogleGenerativeAI(model='gemini-2.0-flash')
+        if replay_store.enabled:
+            set_llm_cache(ReplayLLMCache(replay_store))
+        self.model = ChatGoogleGenerativeAI(
+            model='gemini-2.0-flash', callbacks=[LLMMetricsCallbackHandler()]
+        )
         self.tools = [get_exchange_rate]
 
         self.graph = create_react_agent(
@@ -91,7 +109,15 @@ class CurrencyAgent:
 
         for item in self.graph.stream(inputs, config, stream_mode='values'):
             message = item['messages'][-1]
-            print(message)
+            log_event(
+                logger,
+                logging.DEBUG,
+                'agent_message',
+                session_id=sessionId,
+                type=message.type,
+                content=message.content,
+                tool_calls=getattr(message, 'tool_calls', None),
+            )
             if (
                 isinstance(message, AIMessage)
                 and message.tool_calls
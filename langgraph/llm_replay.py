@@ -0,0 +1,57 @@
+"""LangChain adapter of the LLM replay store.
+
+The store and its configuration are in `a2a_observability.llm_replay`.
+"""
+
+import json
+
+from typing import Any
+
+from a2a_observability.llm_replay import ReplayStore, replay_store
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+
+class ReplayLLMCache(BaseCache):
+    """LangChain LLM cache backed by the replay store.
+
+    Install with `set_llm_cache(ReplayLLMCache())`; LangChain then consults
+    it before every model call and stores each result.
+    """
+
+    def __init__(self, store: ReplayStore = replay_store):
+        self.store = store
+
+    def lookup(self, prompt: str, llm_string: str) -> list[Generation] | None:
+        response = self.store.lookup(self.store.request(llm_string, prompt))
+        if response is None:
+            return None
+        self.store.delay()
+        return [loads(generation) for generation in json.loads(response)]
+
+    async def alookup(
+        self, prompt: str, llm_string: str
+    ) -> list[Generation] | None:
+        response = self.store.lookup(self.store.request(llm_string, prompt))
+        if response is None:
+            return None
+        await self.store.adelay()
+        return [loads(generation) for generation in json.loads(response)]
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: list[Generation]
+    ):
+        self.store.record(
+            self.store.request(llm_string, prompt),
+            llm_string,
+            json.dumps([dumps(generation) for generation in return_val]),
+        )
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: list[Generation]
+    ):
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any):
+        pass
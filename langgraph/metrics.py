@@ -0,0 +1,39 @@
+"""Model call metrics for LangChain.
+
+The other metrics and `install_metrics` are in `a2a_observability.metrics`.
+"""
+
+import time
+
+from typing import Any
+from uuid import UUID
+
+from a2a_observability.metrics import LLM_CALL_DURATION
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """Records the latency of LangChain chat model calls."""
+
+    def __init__(self):
+        self._started: dict[UUID, tuple[str, float]] = {}
+
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: Any, *, run_id: UUID, **kwargs
+    ):
+        model = (kwargs.get('invocation_params') or {}).get('model', 'unknown')
+        self._started[run_id] = (model, time.perf_counter())
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs):
+        self._observe(run_id, 'ok')
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._observe(run_id, 'error')
+
+    def _observe(self, run_id: UUID, status: str):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            model, start = started
+            LLM_CALL_DURATION.labels(model, status).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,171 @@
+"""Background delivery of push notifications for task updates."""
+
+import asyncio
+import logging
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from common.types import Task, TaskState
+from common.utils.push_notification_auth import PushNotificationSenderAuth
+
+
+logger = logging.getLogger(__name__)
+
+
+class SigningPushNotificationSenderAuth(PushNotificationSenderAuth):
+    """Sender auth that can sign a notification without sending it.
+
+    The dispatcher posts notifications with its own HTTP client, so it only
+    needs the token that `send_push_notification` would attach.
+    """
+
+    def generate_jwt(self, data: dict[str, Any]) -> str:
+        """Returns the bearer token for a notification body."""
+        return self._generate_jwt(data)
+
+
+@dataclass
+class _PendingNotification:
+    url: str
+    task_id: str
+    state: TaskState
+    data: dict[str, Any]
+
+
+@dataclass
+class _TaskQueue:
+    pending: deque[_PendingNotification] = field(default_factory=deque)
+    worker: asyncio.Task | None = None
+
+
+class PushNotificationDispatcher:
+    """Delivers push notifications off the request path.
+
+    Notifications are queued per task and delivered in order by a worker
+    that exists only while the task has pending notifications. A queued
+    WORKING update that has not been sent yet is replaced by any newer
+    update for the same task, so a slow receiver only sees the latest
+    progress. Failed deliveries are retried with exponential backoff, and
+    all requests share a single HTTP client.
+    """
+
+    def __init__(
+        self,
+        notification_sender_auth: SigningPushNotificationSenderAuth,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5,
+        timeout: float = 10.0,
+    ):
+        self.notification_sender_auth = notification_sender_auth
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._queues: dict[str, _TaskQueue] = {}
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+
+    def enqueue(self, url: str, task: Task):
+        """Queues a notification for the task's current state."""
+        # The task is serialized now: the store keeps updating its history
+        # and artifacts in place, which would leak into a queued snapshot.
+        notification = _PendingNotification(
+            url=url,
+            task_id=task.id,
+            state=task.status.state,
+            data=task.model_dump(exclude_none=True),
+        )
+        queue = self._queues.setdefault(task.id, _TaskQueue())
+        if queue.pending and queue.pending[-1].state == TaskState.WORKING:
+            queue.pending.pop()
+            self.coalesced += 1
+        queue.pending.append(notification)
+
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._drain(task.id))
+
+    async def _drain(self, task_id: str):
+        queue = self._queues[task_id]
+        try:
+            while queue.pending:
+                notification = queue.pending.popleft()
+                await self._deliver(notification)
+        finally:
+            if not queue.pending:
+                self._queues.pop(task_id, None)
+
+    async def _deliver(self, notification: _PendingNotification):
+        data = notification.data
+        jwt_token = self.notification_sender_auth.generate_jwt(data)
+        headers = {'Authorization': f'Bearer {jwt_token}'}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._get_client().post(
+                    notification.url, json=data, headers=headers
+                )
+                response.raise_for_status()
+                self.sent += 1
+                logger.info(
+                    'Push notification sent for task %s => %s',
+                    notification.task_id,
+                    notification.state,
+                )
+                return
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    logger.warning(
+                        'Push notification rejected by %s: %s',
+                        notification.url,
+                        e,
+                    )
+                    break
+                error = e
+            except httpx.HTTPError as e:
+                error = e
+
+            if attempt < self.max_retries:
+                delay = self.backoff_seconds * (2**attempt)
+                logger.info(
+                    'Retrying push notification to %s in %.1fs: %s',
+                    notification.url,
+                    delay,
+                    error,
+                )
+                await asyncio.sleep(delay)
+            else:
+                logger.warning(
+                    'Giving up on push notification to %s: %s',
+                    notification.url,
+                    error,
+                )
+        self.failed += 1
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'pending': sum(len(q.pending) for q in self._queues.values()),
+            'sent': self.sent,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+        }
+
+    async def aclose(self):
+        """Waits for queued notifications and closes the HTTP client."""
+        workers = [
+            q.worker for q in self._queues.values() if q.worker is not None
+        ]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,9 +1,10 @@
 import asyncio
 import logging
-import traceback
 
 from collections.abc import AsyncIterable
 
+from a2a_observability.metrics import TASK_REQUESTS
+from a2a_observability.tracing import start_span, traceparent_from_metadata
 from agent import CurrencyAgent
 from common.server import utils
 from common.server.task_manager import InMemoryTaskManager
@@ -27,7 +28,11 @@ from common.types import (
     TaskStatusUpdateEvent,
     TextPart,
 )
-from common.utils.push_notification_auth import PushNotificationSenderAuth
+from push_dispatcher import (
+    PushNotificationDispatcher,
+    SigningPushNotificationSenderAuth,
+)
+from worker_pool import WorkerPool
 
 
 logger = logging.getLogger(__name__)
@@ -37,13 +42,32 @@ class AgentTaskManager(InMemoryTaskManager):
     def __init__(
         self,
         agent: CurrencyAgent,
-        notification_sender_auth: PushNotificationSenderAuth,
+        notification_sender_auth: SigningPushNotificationSenderAuth,
+        max_concurrent_invocations: int = 4,
     ):
         super().__init__()
         self.agent = agent
         self.notification_sender_auth = notification_sender_auth
+        self.notification_dispatcher = PushNotificationDispatcher(
+            notification_sender_auth
+        )
+        # Non-streaming invocations are synchronous; run them on a bounded
+        # pool so a slow request does not block the event loop.
+        self.worker_pool = WorkerPool(
+            max_workers=max_concurrent_invocations, name='currency-agent'
+        )
 
     async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
+        task_send_params: TaskSendParams = request.params
+        with start_span(
+            'agent.stream',
+            traceparent=traceparent_from_metadata(task_send_params.metadata),
+            task_id=task_send_params.id,
+            session_id=task_send_params.sessionId,
+        ):
+            await self._stream_agent(request)
+
+    async def _stream_agent(self, request: SendTaskStreamingRequest):
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
 
@@ -95,6 +119,10 @@ class AgentTaskManager(InMemoryTaskManager):
 
         except Exception as e:
             logger.error(f'An error occurred while streaming the response: {e}')
+            latest_task = await self.update_store(
+                task_send_params.id, TaskStatus(state=TaskState.FAILED), None
+            )
+            await self.send_task_notification(latest_task)
             await self.enqueue_events_for_sse(
                 task_send_params.id,
                 InternalError(
@@ -133,6 +161,7 @@ class AgentTaskManager(InMemoryTaskManager):
 
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         """Handles the 'send task' request."""
+        TASK_REQUESTS.labels(request.method).inc()
         validation_error = self._validate_request(request)
         if validation_error:
             return SendTaskResponse(id=request.id, error=validation_error.error)
@@ -157,9 +186,15 @@ class AgentTaskManager(InMemoryTaskManager):
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
         try:
-            agent_response = self.agent.invoke(
-                query, task_send_params.sessionId
-            )
+            with start_span(
+                'agent.invoke',
+                traceparent=traceparent_from_metadata(task_send_params.metadata),
+                task_id=task_send_params.id,
+                session_id=task_send_params.sessionId,
+            ):
+                agent_response = await self.worker_pool.run(
+                    self.agent.invoke, query, task_send_params.sessionId
+                )
         except Exception as e:
             logger.error(f'Error invoking agent: {e}')
             raise ValueError(f'Error invoking agent: {e}')
@@ -168,6 +203,7 @@ class AgentTaskManager(InMemoryTaskManager):
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        TASK_REQUESTS.labels(request.method).inc()
         try:
             error = self._validate_request(request)
             if error:
@@ -197,8 +233,7 @@ class AgentTaskManager(InMemoryTaskManager):
                 request.id, task_send_params.id, sse_event_queue
             )
         except Exception as e:
-            logger.error(f'Error in SSE stream: {e}')
-            print(traceback.format_exc())
+            logger.error(f'Error in SSE stream: {e}', exc_info=True)
             return JSONRPCResponse(
                 id=request.id,
                 error=InternalError(
@@ -245,9 +280,9 @@ class AgentTaskManager(InMemoryTaskManager):
         push_info = await self.get_push_notification_info(task.id)
 
         logger.info(f'Notifying for task {task.id} => {task.status.state}')
-        await self.notification_sender_auth.send_push_notification(
-            push_info.url, data=task.model_dump(exclude_none=True)
-        )
+        # Delivery happens in the background so a slow receiver never
+        # delays the SSE stream.
+        self.notification_dispatcher.enqueue(push_info.url, task)
 
     async def on_resubscribe_to_task(
         self, request
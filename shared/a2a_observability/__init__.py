@@ -0,0 +1 @@
+"""Observability code shared by the host and the agent samples."""
@@ -0,0 +1,86 @@
+"""Record and replay of `genai.Client` calls.
+
+`wrap_genai_client` returns a stand-in for the client whose
+`models.generate_content` goes through the replay store.
+"""
+
+import hashlib
+import threading
+
+from collections.abc import Callable
+from typing import Any
+
+from google import genai
+from google.genai import types
+from pydantic import BaseModel
+
+from a2a_observability.llm_replay import ReplayStore, replay_store
+
+
+def _to_json(value: Any) -> Any:
+    """Converts request objects to JSON values; bytes become digests."""
+    if isinstance(value, BaseModel):
+        return _to_json(value.model_dump(exclude_none=True))
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return value
+
+
+class _ReplayModels:
+    def __init__(self, client: 'ReplayGenaiClient'):
+        self._client = client
+
+    def generate_content(
+        self, *, model: str, contents: Any, config: Any = None
+    ) -> types.GenerateContentResponse:
+        store = self._client.store
+        request = store.request(model, _to_json(contents), _to_json(config))
+        response = store.lookup(request)
+        if response is not None:
+            store.delay()
+            return types.GenerateContentResponse.model_validate_json(response)
+        result = self._client.client.models.generate_content(
+            model=model, contents=contents, config=config
+        )
+        store.record(request, model, result.model_dump_json(exclude_none=True))
+        return result
+
+
+class ReplayGenaiClient:
+    """Stands in for `genai.Client` and serves `models.generate_content`.
+
+    The real client is created on the first call that is not replayed, so
+    replaying needs no credentials.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], genai.Client] = genai.Client,
+        store: ReplayStore = replay_store,
+    ):
+        self.store = store
+        self._client_factory = client_factory
+        self._client: genai.Client | None = None
+        self._client_lock = threading.Lock()
+        self.models = _ReplayModels(self)
+
+    @property
+    def client(self) -> genai.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+
+def wrap_genai_client(
+    client_factory: Callable[[], genai.Client] = genai.Client,
+) -> genai.Client | ReplayGenaiClient:
+    """Returns a replaying client if replay is enabled, else a real one."""
+    if replay_store.enabled:
+        return ReplayGenaiClient(client_factory)
+    return client_factory()
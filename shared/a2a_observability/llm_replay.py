@@ -0,0 +1,190 @@
+"""Record and replay of LLM calls.
+
+Responses are stored on disk keyed by the model, the normalized request and
+the tools offered to the model, so the agent can run offline and
+deterministically. The mode is read from the environment:
+
+    LLM_REPLAY_MODE     off (default), record, replay or auto
+    LLM_REPLAY_DIR      directory of recorded responses (.llm_replay)
+    LLM_REPLAY_LATENCY  seconds to wait before returning a replayed response
+
+`record` calls the model and stores every response, `replay` only serves
+stored responses and fails on a miss, and `auto` replays when possible and
+records otherwise.
+
+Ids such as task, session and tool call ids differ between runs, so they
+are left out of the key. The ids of a recorded request are mapped to the
+ids of the current request when its response is replayed.
+
+The projects hook their framework's model calls into `replay_store`; the
+adapter for `genai.Client` is in `a2a_observability.genai_replay`.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from dataclasses import dataclass
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'record', 'replay', 'auto')
+
+_ID_PATTERN = re.compile(
+    r'(?<![0-9a-f])[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?'
+    r'[0-9a-f]{12}(?![0-9a-f])'
+)
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode when no response was recorded for a request."""
+
+
+@dataclass
+class ReplayRequest:
+    key: str
+    ids: list[str]
+
+
+class ReplayStore:
+    def __init__(
+        self,
+        mode: str | None = None,
+        directory: str | None = None,
+        latency: float | None = None,
+    ):
+        self.mode = (mode or os.getenv('LLM_REPLAY_MODE', 'off')).lower()
+        if self.mode not in MODES:
+            raise ValueError(f'Invalid LLM_REPLAY_MODE: {self.mode}')
+        self.directory = directory or os.getenv('LLM_REPLAY_DIR', '.llm_replay')
+        if latency is None:
+            latency = float(os.getenv('LLM_REPLAY_LATENCY', '0'))
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ('replay', 'auto')
+
+    @property
+    def recording(self) -> bool:
+        return self.mode in ('record', 'auto')
+
+    def request(
+        self, model: str, payload: Any, tools: Any = None
+    ) -> ReplayRequest:
+        """Builds the key of a request from JSON-serializable parts."""
+        ids: list[str] = []
+
+        def normalize(value: str) -> str:
+            def replace(match: re.Match) -> str:
+                if match.group() not in ids:
+                    ids.append(match.group())
+                return f'<id{ids.index(match.group())}>'
+
+            return _ID_PATTERN.sub(replace, ' '.join(value.split()))
+
+        def canonical(value: Any) -> Any:
+            if isinstance(value, str):
+                return normalize(value)
+            if isinstance(value, dict):
+                return {str(k): canonical(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [canonical(v) for v in value]
+            return value
+
+        text = json.dumps(
+            canonical([model, payload, tools]), sort_keys=True, default=str
+        )
+        return ReplayRequest(
+            key=hashlib.sha256(text.encode()).hexdigest(), ids=ids
+        )
+
+    def lookup(self, request: ReplayRequest) -> str | None:
+        """Returns the recorded response with its ids mapped to the request's.
+
+        Raises ReplayMiss in replay mode if nothing was recorded.
+        """
+        if not self.replaying:
+            return None
+        entry = self._load(request.key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            if self.mode == 'replay':
+                raise ReplayMiss(f'No recorded LLM response for {request.key}')
+            return None
+        response = entry['response']
+        for recorded_id, current_id in zip(entry['ids'], request.ids):
+            response = response.replace(recorded_id, current_id)
+        return response
+
+    def record(self, request: ReplayRequest, model: str, response: str):
+        if not self.recording:
+            return
+        entry = {'model': model, 'ids': request.ids, 'response': response}
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first so readers never see a partial
+        # entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(request.key))
+        with self._lock:
+            self._entries[request.key] = entry
+            self.recorded += 1
+        logger.info(f'Recorded LLM response {request.key}')
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    async def adelay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'recorded': self.recorded,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _load(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+
+replay_store = ReplayStore()
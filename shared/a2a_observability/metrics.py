@@ -0,0 +1,180 @@
+"""Prometheus metrics for the host and the A2A servers.
+
+`install_metrics` adds a `/metrics` endpoint and request metrics to a
+Starlette (or FastAPI) app. When the endpoint is scraped, it exports the
+state of an A2A server's task manager and the given stats. Durations of
+traced operations are recorded from finished tracing spans. The model
+call metrics are recorded by each framework's adapter.
+"""
+
+import time
+
+from collections import Counter as StateCounter
+from collections.abc import Callable
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from a2a_observability.tracing import Span, add_span_processor
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120
+)
+
+HTTP_REQUESTS = Counter(
+    'a2a_http_requests_total',
+    'HTTP requests handled, by method, path prefix and status.',
+    ['method', 'path', 'status'],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'a2a_http_request_duration_seconds',
+    'Time until an HTTP response (including SSE streams) completed.',
+    ['method', 'path'],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_REQUESTS = Counter(
+    'a2a_task_requests_total', 'A2A task requests, by method.', ['method']
+)
+SPAN_DURATION = Histogram(
+    'a2a_span_duration_seconds',
+    'Duration of traced operations such as chat turns and task handling.',
+    ['span', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_DURATION = Histogram(
+    'a2a_llm_call_duration_seconds',
+    'LLM call latency, by model and outcome.',
+    ['model', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def _record_span(span: Span):
+    SPAN_DURATION.labels(span.name, span.status).observe(
+        span.end_time - span.start_time
+    )
+
+
+add_span_processor(_record_span)
+
+
+class MetricsMiddleware:
+    """Counts requests and measures their duration."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        # Only the first path segment is used, so ids in paths do not
+        # create a time series each.
+        path = '/' + scope['path'].split('/')[1]
+        method = scope['method']
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method, path).observe(
+                time.perf_counter() - start
+            )
+
+
+class StatsCollector:
+    """Exports stats when metrics are scraped.
+
+    `stats` maps a name to a function returning a dict of numbers; each
+    number is exported as the gauge `a2a_<name>_<key>`.
+    """
+
+    def __init__(self, stats: dict[str, Callable[[], dict[str, Any]]]):
+        self.stats = stats
+
+    def collect(self):
+        for name, stats in self.stats.items():
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    yield GaugeMetricFamily(
+                        f'a2a_{name}_{key}', f'{name} {key}.', value=value
+                    )
+
+
+class TaskManagerCollector:
+    """Exports the state of an `InMemoryTaskManager` when scraped."""
+
+    def __init__(self, task_manager: Any):
+        self.task_manager = task_manager
+
+    def collect(self):
+        states = StateCounter(
+            task.status.state.value
+            for task in list(self.task_manager.tasks.values())
+        )
+        tasks = GaugeMetricFamily(
+            'a2a_tasks', 'Tasks in the task store, by state.', labels=['state']
+        )
+        for state, count in states.items():
+            tasks.add_metric([state], count)
+        yield tasks
+        yield GaugeMetricFamily(
+            'a2a_task_store_size',
+            'Tasks held in the task store.',
+            value=len(self.task_manager.tasks),
+        )
+        yield GaugeMetricFamily(
+            'a2a_sse_subscribers',
+            'Open SSE subscriptions.',
+            value=sum(
+                len(subscribers)
+                for subscribers in list(
+                    self.task_manager.task_sse_subscribers.values()
+                )
+            ),
+        )
+        yield GaugeMetricFamily(
+            'a2a_push_notification_configs',
+            'Tasks with a push notification config.',
+            value=len(self.task_manager.push_notification_infos),
+        )
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+def install_metrics(
+    app: Starlette,
+    stats: dict[str, Callable[[], dict[str, Any]]] | None = None,
+    task_manager: Any = None,
+):
+    """Adds `/metrics` and request metrics to an app.
+
+    Pass the `InMemoryTaskManager` of an A2A server to export its tasks.
+    """
+    if task_manager is not None:
+        REGISTRY.register(TaskManagerCollector(task_manager))
+    REGISTRY.register(StatsCollector(stats or {}))
+    app.add_middleware(MetricsMiddleware)
+    app.add_route('/metrics', metrics_endpoint, methods=['GET'])
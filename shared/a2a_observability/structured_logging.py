@@ -0,0 +1,194 @@
+"""Structured, sampled and size-bounded logging.
+
+`log_event` logs an event name with fields instead of printing a payload.
+It returns before doing any work when the level is disabled, logs only a
+sample of high-volume events, and truncates long strings (such as base64
+images) before the record is queued. `configure_logging` replaces
+`logging.basicConfig`: records are written by a background thread, so
+callers never block on a slow stdout or pipe. The configuration is read
+from the environment:
+
+    LOG_LEVEL            root level (INFO)
+    LOG_FORMAT           text (default) or json
+    LOG_MAX_FIELD_CHARS  characters kept of each string field (200)
+    LOG_SAMPLE_RATES     fraction of records logged per event, for example
+                         stream_event=0.1,agent_message=0.01
+    LOG_QUEUE_SIZE       records buffered for the writer thread (10000)
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+from collections import defaultdict
+from typing import Any
+
+from a2a_observability.tracing import current_span
+
+
+MAX_LIST_ITEMS = 20
+
+
+def _parse_rates(value: str) -> dict[str, float]:
+    rates = {}
+    for item in value.split(','):
+        if '=' in item:
+            event, rate = item.split('=', 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+def truncate(value: Any, max_chars: int) -> Any:
+    """Returns a JSON-serializable copy of the value with bounded size."""
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f'{value[:max_chars]}...<{len(value)} chars>'
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<{len(value)} bytes>'
+    if isinstance(value, dict):
+        return {str(k): truncate(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [truncate(v, max_chars) for v in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f'<{len(value) - MAX_LIST_ITEMS} more>')
+        return items
+    return truncate(repr(value), max_chars)
+
+
+class Sampler:
+    """Keeps every n-th record of an event, where n is 1 / rate."""
+
+    def __init__(self, rates: dict[str, float]):
+        self.rates = rates
+        self._counters = defaultdict(itertools.count)
+
+    def sample(self, event: str) -> bool:
+        rate = self.rates.get(event, 1.0)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        return next(self._counters[event]) % round(1 / rate) == 0
+
+
+max_field_chars = int(os.getenv('LOG_MAX_FIELD_CHARS', '200'))
+sampler = Sampler(_parse_rates(os.getenv('LOG_SAMPLE_RATES', '')))
+
+
+def log_event(
+    logger: logging.Logger,
+    level: int,
+    event: str,
+    message: str = '',
+    /,
+    **fields: Any,
+):
+    """Logs an event with truncated fields, subject to sampling."""
+    if not logger.isEnabledFor(level) or not sampler.sample(event):
+        return
+    fields = truncate(fields, max_field_chars)
+    if (span := current_span()) is not None:
+        fields['trace_id'] = span.trace_id
+        fields['span_id'] = span.span_id
+    logger.log(
+        level,
+        message or event,
+        extra={'event': event, 'fields': fields},
+        stacklevel=2,
+    )
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            text += ' ' + ' '.join(
+                f'{key}={json.dumps(value, ensure_ascii=False)}'
+                for key, value in fields.items()
+            )
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if (event := getattr(record, 'event', None)) is not None:
+            entry['event'] = event
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are and drops them when the queue is full.
+
+    The writer thread runs in the same process, so the records are not
+    formatted for pickling in the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_queue_handler: _QueueHandler | None = None
+
+
+def configure_logging(level: str | int | None = None, stream: Any = None):
+    """Sends all records through a queue to a background writer thread.
+
+    Records are written to `stream` (stderr by default). Calling it again
+    only updates the level.
+    """
+    global _queue_handler
+    root = logging.getLogger()
+    root.setLevel(level or os.getenv('LOG_LEVEL', 'INFO').upper())
+    with _lock:
+        if _queue_handler is not None:
+            return
+        handler = logging.StreamHandler(stream)
+        if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(TextFormatter())
+        log_queue = queue.Queue(int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+        listener = logging.handlers.QueueListener(log_queue, handler)
+        listener.start()
+        atexit.register(listener.stop)
+        _queue_handler = _QueueHandler(log_queue)
+        root.handlers = [_queue_handler]
+
+
+def logging_stats() -> dict[str, int]:
+    return {
+        'dropped': _queue_handler.dropped if _queue_handler else 0,
+        'queued': _queue_handler.queue.qsize() if _queue_handler else 0,
+    }
@@ -0,0 +1,178 @@
+"""Minimal tracing with W3C trace context propagation.
+
+Spans are kept in a context variable, so nested `start_span` blocks form a
+tree within a request, including across `await` points and in threads that
+run with a copied context. The current span is carried to other processes
+as a `traceparent` value (an HTTP header, or the `traceparent` key of the
+A2A task metadata).
+
+Finished spans are appended as JSON lines to the file named by
+`TRACE_EXPORT_FILE`. Several processes can share one file. Without the
+variable, spans are still created and propagated but not exported. Each
+record carries the service name passed to `configure_tracing`, which
+`TRACE_SERVICE_NAME` overrides.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterator
+
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'a2a')
+TRACEPARENT_KEY = 'traceparent'
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: float = field(default_factory=time.time)
+    end_time: float | None = None
+    status: str = 'ok'
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    'current_span', default=None
+)
+# Called with every finished span, e.g. to record metrics.
+_span_processors: list[Callable[[Span], None]] = []
+
+
+def configure_tracing(service_name: str):
+    """Sets the service name of exported spans unless the env sets one."""
+    global SERVICE_NAME
+    SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', service_name)
+
+
+def add_span_processor(processor: Callable[[Span], None]):
+    _span_processors.append(processor)
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    """Returns the trace id and parent span id of a `traceparent` value."""
+    if not value:
+        return None
+    parts = value.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    trace_id, span_id = parts[1], parts[2]
+    if trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return trace_id, span_id
+
+
+def traceparent_from_metadata(metadata: dict[str, Any] | None) -> str | None:
+    """Returns the `traceparent` carried in A2A task or message metadata."""
+    return (metadata or {}).get(TRACEPARENT_KEY)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def current_traceparent() -> str | None:
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+def new_span(
+    name: str, traceparent: str | None = None, **attributes: Any
+) -> Span:
+    """Creates a span without making it current; end it with `end_span`.
+
+    The span is a child of the current span, or of `traceparent` if given,
+    and starts a new trace otherwise.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is None and (current := _current_span.get()) is not None:
+        parent = current.trace_id, current.span_id
+    trace_id, parent_id = parent or (secrets.token_hex(16), None)
+    return Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        attributes=attributes,
+    )
+
+
+def end_span(span: Span, error: BaseException | None = None):
+    span.end_time = time.time()
+    if error is not None:
+        span.status = 'error'
+        span.set_attribute('error', repr(error))
+    for processor in _span_processors:
+        processor(span)
+    exporter.export(span)
+
+
+@contextmanager
+def start_span(
+    name: str, traceparent: str | None = None, **attributes: Any
+) -> Iterator[Span]:
+    """Runs a block in a new span that is current within the block."""
+    span = new_span(name, traceparent, **attributes)
+    token = _current_span.set(span)
+    error = None
+    try:
+        yield span
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # An async generator closed from another context; that context
+            # never saw the span, so there is nothing to restore.
+            pass
+        end_span(span, error)
+
+
+class JsonlSpanExporter:
+    """Appends finished spans to a JSON lines file."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, span: Span):
+        if not self.path:
+            return
+        record = asdict(span)
+        record['service'] = SERVICE_NAME
+        record['duration_ms'] = (span.end_time - span.start_time) * 1000
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', buffering=1)
+                self._file.write(line)
+            except OSError as e:
+                logger.warning('Failed to export span %s: %s', span.name, e)
+
+
+exporter = JsonlSpanExporter(os.getenv('TRACE_EXPORT_FILE'))